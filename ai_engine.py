@@ -1,30 +1,53 @@
-import pickle
-import pandas as pd
+import json
 import numpy as np
 import os
-import warnings
-
-# Suppress the specific sklearn warning about feature names
-warnings.filterwarnings("ignore", category=UserWarning)
+import sqlite3
+import database
+import forest_engine
+import model_registry
 
 # --- CONFIG (ROBUST PATHS) ---
 # Get the folder where this script lives
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Point to the model files in the SAME folder
+# train_ai writes the sklearn pickles (kept for incremental training) and exports the
+# compact, memory-mapped copy in MODEL_DIR that the app serves from.
 MODEL_PATH = os.path.join(CURRENT_DIR, "seed_predictor_model.pkl")
 ENCODER_PATH = os.path.join(CURRENT_DIR, "label_encoder.pkl")
+MODEL_DIR = os.path.join(CURRENT_DIR, "seed_model")
+
+# The "Reasoning" label always comes from counterfactuals (re-predict with each active flag
+# switched off), and so do the dashboard drivers the app serves.
+#   "counterfactual" - Contributions are the counterfactual effects of the active flags (default)
+#   "paths"          - Contributions from decision paths, for offline analysis only: every flag is
+#                      a fixed function of the month, so paths split the credit between month and
+#                      flag splits arbitrarily and can contradict the label. Costs a second pass.
+ATTRIBUTION_MODES = ("counterfactual", "paths")
+DEFAULT_ATTRIBUTION = "counterfactual"
+REASON_THRESHOLD = 100  # Units of monthly sales a flag must move the prediction to be named
+FORECAST_FORMAT = 2     # Bump when predict_batch's output changes, so stored forecasts are recomputed
+
+# Short display names of the context flags
+FLAG_LABELS = {
+    'is_monsoon': "Monsoon", 'is_hot': "Hot Season", 'is_holiday': "School Holiday",
+    'is_cny': "CNY", 'is_ramadan': "Ramadan", 'is_deepavali': "Deepavali"
+}
 
 class SeedAI:
-    def __init__(self):
-        # Load Model & Encoder
+    def __init__(self, version=None, attribution=DEFAULT_ATTRIBUTION):
+        if attribution not in ATTRIBUTION_MODES:
+            raise ValueError(f"Unknown attribution mode: {attribution}")
+        # Artifact content hash (set when loaded through get_shared_ai)
+        self.version = version
+        self.attribution = attribution
+        self._tables = None  # Decision-path lookup tables, built on first use
+        # Load Model (product classes come with it, in encoder order)
         try:
-            with open(MODEL_PATH, 'rb') as f:
-                self.model = pickle.load(f)
-            with open(ENCODER_PATH, 'rb') as f:
-                self.le = pickle.load(f)
+            self.model = forest_engine.CompactForest(MODEL_DIR)
+            self.classes = self.model.classes
         except FileNotFoundError:
-            print(f"ERROR: Model files not found at {MODEL_PATH}")
+            print(f"ERROR: Model files not found at {MODEL_DIR}")
             print("Please run 'train_ai.py' first.")
             exit()
 
@@ -42,69 +65,239 @@ class SeedAI:
             "is_deepavali": 1 if month == 10 else 0
         }
 
+    # Reasoning order, and the feature column each context flag lives in
+    REASON_CHECKS = [
+        ('is_ramadan', "Ramadan Spike"),
+        ('is_deepavali', "Deepavali Spike"),
+        ('is_cny', "CNY Spike"),
+        ('is_hot', "Hot Season Demand"),
+        ('is_holiday', "School Holiday Surge"),
+        ('is_monsoon', "Monsoon Drop")
+    ]
+    FLAG_INDEX = {
+        'is_monsoon': 2, 'is_hot': 3, 'is_holiday': 4,
+        'is_cny': 5, 'is_ramadan': 6, 'is_deepavali': 7
+    }
+
     def predict_with_reasoning(self, product_name, month):
-        # 1. Prepare Input
-        try:
-            # Try to convert name to ID
-            prod_id = self.le.transform([product_name])[0]
-            
-            # --- NORMAL PREDICTION PATH (Known Product) ---
+        return self.predict_batch([(product_name, month)])[0]
+
+    def _counterfactual_contributions(self, feature_rows):
+        """
+        Baseline prediction per row, and for every active flag the change caused by switching it off.
+        Baselines and all counterfactuals go into one feature matrix and one predict call.
+        """
+        rows = []
+        plans = []  # Per input row: (baseline row, [(flag, counterfactual row)])
+        for features in feature_rows:
+            baseline_row = len(rows)
+            rows.append(features)
+            counterfactuals = []
+            for flag_name, _ in self.REASON_CHECKS:
+                if features[self.FLAG_INDEX[flag_name]] == 1:
+                    cf_features = features.copy()
+                    cf_features[self.FLAG_INDEX[flag_name]] = 0
+                    counterfactuals.append((flag_name, len(rows)))
+                    rows.append(cf_features)
+            plans.append((baseline_row, counterfactuals))
+
+        preds = self.model.predict(np.array(rows))
+        results = []
+        for baseline_row, counterfactuals in plans:
+            baseline_pred = int(preds[baseline_row])
+            contributions = {flag_name: baseline_pred - int(preds[cf_row]) for flag_name, cf_row in counterfactuals}
+            results.append((baseline_pred, contributions))
+        return results
+
+    def _path_tables(self):
+        """
+        Contribution vector of every node, built once per model. A leaf's decision path is fixed,
+        so the change in node mean at every split on the way down (credited to the split's
+        feature) can be summed ahead of time.
+        """
+        if self._tables is None:
+            model = self.model
+            contrib = np.zeros((len(model.value), model.n_features))
+
+            # Accumulate root -> leaf, one level of every tree at a time
+            parents = model.roots[model.left[model.roots] != -1]
+            while len(parents):
+                for children in (model.left[parents], model.right[parents]):
+                    contrib[children] = contrib[parents]
+                    contrib[children, model.feature[parents]] += model.value[children] - model.value[parents]
+                kids = np.concatenate([model.left[parents], model.right[parents]])
+                parents = kids[model.left[kids] != -1]
+            self._tables = contrib
+        return self._tables
+
+    def _path_contributions(self, feature_rows):
+        """
+        Decision-path attribution from a single traversal of the forest (model.apply -> leaf per tree).
+        Per row: prediction = mean root value + sum of the signed feature contributions,
+        so every flag gets a contribution, not just the active ones.
+        """
+        path_contribs = self._path_tables()
+        n_trees = self.model.n_trees
+
+        leaves = self.model.apply(feature_rows)  # (rows, trees) node ids
+
+        preds = self.model.leaf_mean(leaves)
+        contrib = path_contribs[leaves].sum(axis=1) / n_trees
+
+        results = []
+        for i in range(len(feature_rows)):
+            contributions = {flag_name: round(float(contrib[i, idx]), 1) for flag_name, idx in self.FLAG_INDEX.items()}
+            results.append((int(preds[i]), contributions))
+        return results
+
+    def predict_batch(self, pairs):
+        """
+        Predicts many (product_name, month) pairs with a single pass over the model.
+        Returns one result dict per pair, in order (same format as predict_with_reasoning).
+        "Contributions" holds the signed effect of each flag on the prediction (units of monthly sales).
+        """
+        class_ids = {name: i for i, name in enumerate(self.classes)}
+
+        # 1. Prepare Input (unknown products have no encoder id)
+        feature_rows = []
+        for product_name, month in pairs:
+            prod_id = class_ids.get(product_name)
+            if prod_id is None:
+                continue
             flags = self.get_context_flags(month)
-            
-            features = [
-                prod_id, month, 
-                flags['is_monsoon'], flags['is_hot'], flags['is_holiday'], 
+            feature_rows.append([
+                prod_id, month,
+                flags['is_monsoon'], flags['is_hot'], flags['is_holiday'],
                 flags['is_cny'], flags['is_ramadan'], flags['is_deepavali']
+            ])
+
+        # 2. Predict + attribute every known pair at once
+        explained, drivers = [], []
+        if feature_rows:
+            explained = self._counterfactual_contributions(feature_rows)
+            if self.attribution == "paths":
+                drivers = [contributions for _, contributions in self._path_contributions(feature_rows)]
+            else:
+                drivers = [contributions for _, contributions in explained]
+        explained, drivers = iter(explained), iter(drivers)
+
+        # 3. Reasoning Engine
+        results = []
+        for product_name, month in pairs:
+            if product_name not in class_ids:
+                # --- FALLBACK PATH (Unknown / New Product) ---
+                # If the product is new (not in encoder), we return a default "Cold Start" value.
+                results.append({
+                    "Product": product_name,
+                    "Month": month,
+                    "Predicted_Sales": 50,  # Default 'safe' value for new items
+                    "Reasoning": "🆕 New Product / Insufficient Data",
+                    "Contributions": {}
+                })
+                continue
+
+            baseline_pred, effects = next(explained)
+            reasons = [
+                reason_text for flag_name, reason_text in self.REASON_CHECKS
+                if abs(effects.get(flag_name, 0)) > REASON_THRESHOLD  # Only active flags have an effect
             ]
-            
-            baseline_pred = int(self.model.predict([features])[0])
-            
-            # Reasoning Engine
-            reasons = []
-            check_list = [
-                ('is_ramadan', "Ramadan Spike"),
-                ('is_deepavali', "Deepavali Spike"),
-                ('is_cny', "CNY Spike"),
-                ('is_hot', "Hot Season Demand"),
-                ('is_holiday', "School Holiday Surge"),
-                ('is_monsoon', "Monsoon Drop")
-            ]
-            
-            idx_map = {
-                'is_monsoon': 2, 'is_hot': 3, 'is_holiday': 4, 
-                'is_cny': 5, 'is_ramadan': 6, 'is_deepavali': 7
-            }
-            
-            for flag_name, reason_text in check_list:
-                if flags[flag_name] == 1:
-                    cf_features = features.copy()
-                    cf_features[idx_map[flag_name]] = 0
-                    cf_pred = int(self.model.predict([cf_features])[0])
-                    diff = baseline_pred - cf_pred
-                    
-                    if diff > 100:
-                        reasons.append(reason_text)
-                    elif diff < -100:
-                        reasons.append(reason_text)
-
-            reason_str = ", ".join(reasons) if reasons else "Standard Seasonal Demand"
-            
-            return {
+
+            results.append({
                 "Product": product_name,
                 "Month": month,
                 "Predicted_Sales": baseline_pred,
-                "Reasoning": reason_str
-            }
+                "Reasoning": ", ".join(reasons) if reasons else "Standard Seasonal Demand",
+                "Contributions": next(drivers)
+            })
+        return results
 
-        except (ValueError, IndexError):
-            # --- FALLBACK PATH (Unknown / New Product) ---
-            # If the product is new (not in encoder), we return a default "Cold Start" value.
-            return {
-                "Product": product_name,
+# --- SHARED INSTANCE ---
+def get_shared_ai():
+    """
+    Process-wide read-only SeedAI shared by all sessions.
+    The model is loaded once and reloaded only when the model files change.
+    """
+    return model_registry.get("seed_ai", forest_engine.artifact_files(MODEL_DIR), SeedAI)
+
+# --- FORECAST TABLE ---
+# The model only sees product x month, so its whole output space can be written out once per
+# model version and served with an indexed lookup instead of running the forest per request.
+def forecast_version(ai):
+    """
+    Key of ai's rows in the forecasts table: model artifact hash + attribution mode + output format.
+    """
+    return f"{ai.version}/{ai.attribution}/{FORECAST_FORMAT}"
+
+def materialize_forecasts(ai):
+    """
+    Writes every known product x month prediction of `ai` into the forecasts table
+    and drops rows left by other model versions. Returns the number of rows written.
+    """
+    version = forecast_version(ai)
+    pairs = [(name, m) for name in ai.classes for m in range(1, 13)]
+    rows = [
+        (version, r["Product"], r["Month"], r["Predicted_Sales"], r["Reasoning"], json.dumps(r["Contributions"]))
+        for r in ai.predict_batch(pairs)
+    ]
+    with database.connection() as conn:
+        conn.execute("DELETE FROM forecasts WHERE model_version != ?", (version,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO forecasts (model_version, product_name, month, predicted_sales, reasoning, contributions) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+    return len(rows)
+
+def get_forecasts(ai, pairs):
+    """
+    Same results as ai.predict_batch(pairs), read from the forecasts table.
+    The table is filled on first use of a model version; pairs it does not cover
+    (e.g. products added after training) fall back to the model.
+    """
+    if ai.version is None:
+        return ai.predict_batch(pairs)  # Not a registry-loaded model: no version to key on
+
+    version = forecast_version(ai)
+    names = sorted({name for name, _ in pairs})
+    try:
+        with database.connection() as conn:
+            # Primary-key probe; also notices a regenerated database that lost the table's rows
+            if conn.execute("SELECT 1 FROM forecasts WHERE model_version = ? LIMIT 1", (version,)).fetchone() is None:
+                print(f"Materializing forecasts for model {version}...")
+                materialize_forecasts(ai)
+
+            placeholders = ", ".join("?" * len(names))
+            rows = conn.execute(
+                f"SELECT product_name, month, predicted_sales, reasoning, contributions FROM forecasts WHERE model_version = ? AND product_name IN ({placeholders})",
+                [version, *names]
+            ).fetchall()
+    except sqlite3.OperationalError:
+        return ai.predict_batch(pairs)  # Database without the forecasts table yet
+
+    table = {(name, month): (sales, reason, contribs) for name, month, sales, reason, contribs in rows}
+    missing = [pair for pair in pairs if pair not in table]
+    fallback = dict(zip(missing, ai.predict_batch(missing))) if missing else {}
+
+    results = []
+    for name, month in pairs:
+        if (name, month) in table:
+            sales, reason, contribs = table[(name, month)]
+            results.append({
+                "Product": name,
                 "Month": month,
-                "Predicted_Sales": 50,  # Default 'safe' value for new items
-                "Reasoning": "🆕 New Product / Insufficient Data"
-            }
+                "Predicted_Sales": sales,
+                "Reasoning": reason,
+                "Contributions": json.loads(contribs) if contribs else {}
+            })
+        else:
+            results.append(fallback[(name, month)])
+    return results
+
+def format_contributions(contributions, top=3):
+    """
+    "Ramadan +157, Deepavali -33": the largest signed flag effects, for tooltips.
+    """
+    ranked = sorted(contributions.items(), key=lambda item: abs(item[1]), reverse=True)[:top]
+    return ", ".join(f"{FLAG_LABELS[flag]} {value:+,.0f}" for flag, value in ranked)
 
 # --- TEST RUN ---
 if __name__ == "__main__":
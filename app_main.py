@@ -1,9 +1,13 @@
 import streamlit as st
 import login_view
-import app_supplier
-import farmer_view 
-import data_gen 
+import catalog
 import backend  # <--- IMPORT THE HELPER
+from utils import LazyModule
+
+# Role-specific pages (pandas/altair/model for suppliers, mic recorder for farmers)
+# are imported when a role first needs them, so the front page starts fast
+app_supplier = LazyModule("app_supplier")
+farmer_view = LazyModule("farmer_view")
 
 # 1. SETUP PAGE CONFIG (The brain handles this for everyone)
 st.set_page_config(
@@ -35,7 +39,7 @@ def main():
             login_view.login_page()
         else:
             # Show Farmer Shop (Default)
-            products = data_gen.load_products_from_db()
+            products = catalog.load_products_from_db()
             farmer_view.farmer_dashboard(products)
 
     # C. NO ROLE SELECTED (Front Page)
@@ -1,7 +1,9 @@
 import streamlit as st
 import os
-import data_gen
+import catalog
+import database
 import backend
+from utils import LazyModule
 from login_view import role_selection, login_page, supplier_dashboard
 from farmer_view import farmer_dashboard
 
@@ -9,20 +11,20 @@ from farmer_view import farmer_dashboard
 st.set_page_config(layout="wide", page_title="Seseed - Smart Farming")
 
 # --- 2. INITIALIZATION ---
-# Initialize DB if missing
-if not os.path.exists(data_gen.DB_PATH):
-    data_gen.generate_data()
+# Initialize DB if missing (the generator and its images are only loaded in that case)
+if not os.path.exists(database.DB_PATH):
+    LazyModule("data_gen").generate_data()
 
 # Initialize Session State
 backend.initialize_session_state()
 
 # Load Products (Must be done every rerun to get fresh data/state)
-products = data_gen.load_products_from_db()
+products = catalog.load_products_from_db()
 
 # --- 3. MAIN APPLICATION LOGIC ---
 if __name__ == "__main__":
     # Add a warning in the terminal if the DB exists, reminding the user to delete it if they changed images.
-    if os.path.exists(data_gen.DB_PATH):
+    if os.path.exists(database.DB_PATH):
         print("\n[WARNING] 'database.db' exists. The app is loading existing data.")
         print("If you added new local images (like pamelo.png or hoe.png), DELETE 'database.db' and restart the app to regenerate data.\n")
 
@@ -1,8 +1,9 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 import altair as alt 
-from ai_engine import SeedAI 
+from ai_engine import get_shared_ai, get_forecasts, format_contributions
+import catalog
+import database
 import time
 import calendar 
 import datetime 
@@ -175,13 +176,15 @@ def rename_farm_dialog():
 
 # --- DATABASE FUNCTIONS ---
 def get_data():
-    conn = sqlite3.connect('database.db')
-    df_products = pd.read_sql_query("SELECT * FROM products", conn)
-    df_sales = pd.read_sql_query("""
-        SELECT strftime('%Y-%m', date_sold) as month, SUM(quantity) as total_qty
-        FROM sales_history GROUP BY month ORDER BY month
-    """, conn)
-    conn.close()
+    with database.connection() as conn:
+        df_products = pd.read_sql_query("""
+            SELECT id, name, category, price, stock, days_to_grow, peak_month
+            FROM products
+        """, conn)
+        df_sales = pd.read_sql_query("""
+            SELECT printf('%04d-%02d', year, month) as month, SUM(quantity) as total_qty
+            FROM sales_monthly GROUP BY year, month ORDER BY year, month
+        """, conn)
     
     username = st.session_state.get('username', 'Supplier')
     
@@ -193,43 +196,39 @@ def get_data():
     return farm_name, username, df_products, df_sales
 
 def update_stock_in_db(product_name, new_stock):
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute("UPDATE products SET stock = ? WHERE name = ?", (new_stock, product_name))
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE products SET stock = ? WHERE name = ?", (new_stock, product_name))
+    catalog.bump_catalog_version()
 
 def add_product_to_db(name, category, price, stock, grow_days, peak_month):
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO products (name, category, price, stock, days_to_grow, peak_month) 
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (name, category, price, stock, grow_days, peak_month))
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO products (name, category, price, stock, days_to_grow, peak_month) 
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (name, category, price, stock, grow_days, peak_month))
+    catalog.bump_catalog_version()
 
 def delete_product_from_db(product_name):
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM products WHERE name = ?", (product_name,))
-    result = cursor.fetchone()
-    if result:
+    with database.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM products WHERE name = ?", (product_name,))
+        result = cursor.fetchone()
+        if not result:
+            return False
         p_id = result[0]
         cursor.execute("DELETE FROM sales_history WHERE product_id = ?", (p_id,))
         cursor.execute("DELETE FROM products WHERE id = ?", (p_id,))
-        conn.commit()
-        conn.close()
-        return True
-    conn.close()
-    return False
+    catalog.bump_catalog_version()
+    return True
 
 # --- MAIN DASHBOARD FUNCTION ---
 def show_dashboard():
     load_css()
     
     try:
-        ai = SeedAI()
+        ai = get_shared_ai()
     except Exception as e:
         st.error(f"⚠️ AI Engine Error: {e}. Ensure 'train_ai.py' has been run.")
         st.stop()
@@ -278,18 +277,17 @@ def show_dashboard():
     current_month_index = datetime.datetime.now().month 
     
     if not df_products.empty:
-        for index, row in df_products.iterrows():
-            try:
-                prediction = ai.predict_with_reasoning(row['name'], current_month_index)
-                if isinstance(prediction, dict):
-                    predicted_demand = prediction['Predicted_Sales']
-                    current_stock = row['stock']
-                    if current_stock < predicted_demand:
-                        low_stock_count += 1
-                        deficit = int(predicted_demand - current_stock)
-                        low_stock_items.append(f"• {row['name']} (Short by {deficit})")
-            except:
-                pass 
+        try:
+            predictions = get_forecasts(ai, [(name, current_month_index) for name in df_products['name']])
+            for (index, row), prediction in zip(df_products.iterrows(), predictions):
+                predicted_demand = prediction['Predicted_Sales']
+                current_stock = row['stock']
+                if current_stock < predicted_demand:
+                    low_stock_count += 1
+                    deficit = int(predicted_demand - current_stock)
+                    low_stock_items.append(f"• {row['name']} (Short by {deficit})")
+        except:
+            pass 
     
     alert_border = '#D62828' if low_stock_count > 0 else '#3A5A40'
     alert_class = 'alert-text' if low_stock_count > 0 else ''
@@ -334,14 +332,15 @@ def show_dashboard():
         
         # --- FORECAST LOGIC ---
         forecast_data = []
-        for m in range(1, 13):
-            prediction = ai.predict_with_reasoning(selected_name, m)
+        predictions = get_forecasts(ai, [(selected_name, m) for m in range(1, 13)])
+        for m, prediction in zip(range(1, 13), predictions):
             month_name = calendar.month_abbr[m]
             
             forecast_data.append({
                 "Month": month_name,
                 "Predicted Demand": prediction['Predicted_Sales'],
                 "AI Reasoning": prediction['Reasoning'],
+                "Drivers": format_contributions(prediction['Contributions']),
                 "IsCurrentMonth": (m == current_month_index)
             })
 
@@ -368,7 +367,7 @@ def show_dashboard():
             # 2. Tooltip Points (Uses Strict Y Scale)
             points = base_chart.mark_circle(size=120, color='#3A5A40').encode(
                 y=alt.Y('Predicted Demand', scale=y_scale),
-                tooltip=['Month', 'Predicted Demand', 'AI Reasoning']
+                tooltip=['Month', 'Predicted Demand', 'AI Reasoning', 'Drivers']
             )
             
             # 3. Stock Line (Red) - MUST ALSO USE THE STRICT Y SCALE
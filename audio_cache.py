@@ -0,0 +1,84 @@
+import hashlib
+import os
+import threading
+from utils import SizedLRU
+
+# --- VOICE REPLY CACHE ---
+# Synthesized speech keyed by a hash of (language, text): the same reply (the greeting, a
+# repeated price answer) is synthesized once and then served from memory, or from disk after
+# a restart. Files are named by key, so writers in several processes never conflict.
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+AUDIO_DIR = os.path.join(CURRENT_DIR, "static", "audio")
+MAX_MEMORY_BYTES = 16 * 1024 * 1024  # In-memory LRU budget
+MAX_DISK_FILES = 2000                # Least recently used files beyond this are deleted
+
+_lock = threading.Lock()
+_memory = SizedLRU(MAX_MEMORY_BYTES)  # key -> mp3 bytes
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stored": 0}
+
+def audio_key(text, lang='en'):
+    return hashlib.sha256(f"{lang}\n{text}".encode()).hexdigest()
+
+def audio_path(key):
+    return os.path.join(AUDIO_DIR, f"{key}.mp3")
+
+def get(key):
+    """
+    Cached mp3 bytes for a key, or None.
+    """
+    data = _memory.get(key)
+    if data is not None:
+        with _lock:
+            _stats["memory_hits"] += 1
+        return data
+
+    path = audio_path(key)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)  # Disk eviction goes by last use
+    except FileNotFoundError:
+        with _lock:
+            _stats["misses"] += 1
+        return None
+    with _lock:
+        _stats["disk_hits"] += 1
+    _memory.put(key, data)
+    return data
+
+def put(key, data):
+    """
+    Stores mp3 bytes in memory and on disk.
+    """
+    _memory.put(key, data)
+    os.makedirs(AUDIO_DIR, exist_ok=True)
+    path = audio_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    with _lock:
+        _stats["stored"] += 1
+    _trim_disk()
+
+def _trim_disk():
+    try:
+        entries = [e for e in os.scandir(AUDIO_DIR) if e.name.endswith(".mp3")]
+    except FileNotFoundError:
+        return
+    if len(entries) <= MAX_DISK_FILES:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[:len(entries) - MAX_DISK_FILES]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # Trimmed by another process
+
+def stats():
+    memory = _memory.stats()
+    with _lock:
+        s = dict(_stats, entries=memory["entries"], bytes=memory["bytes"])
+    lookups = s["memory_hits"] + s["disk_hits"] + s["misses"]
+    s["hit_rate"] = (s["memory_hits"] + s["disk_hits"]) / lookups if lookups else 0.0
+    return s
@@ -1,12 +1,20 @@
-import sqlite3
+import audio_cache
+import catalog
+import chat_router
+import response_cache
 import streamlit as st
-import google.generativeai as genai
-import os
-import speech_recognition as sr
-from gtts import gTTS
+import hashlib
 import io
-import tempfile
-from pydub import AudioSegment
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from utils import LazyModule, content_words, split_words
+
+# Heavy SDKs load on first use (chat, voice), not when the app starts
+genai = LazyModule("google.generativeai")
+sr = LazyModule("speech_recognition")
+gtts = LazyModule("gtts")
+pydub = LazyModule("pydub")
 
 # --- 1. SETUP GEMINI AI ---
 def configure_ai():
@@ -23,7 +31,21 @@ def configure_ai():
         st.error(f"⚠️ AI Setup Error: {e}")
         return None
 
-model = configure_ai()
+_model = None
+_model_ready = False
+_model_lock = threading.Lock()
+
+def get_model():
+    """
+    The Gemini model, configured on first use (once per process). None if setup failed.
+    """
+    global _model, _model_ready
+    if not _model_ready:
+        with _model_lock:
+            if not _model_ready:
+                _model = configure_ai()
+                _model_ready = True
+    return _model
 
 # --- 2. SESSION STATE SETUP ---
 def initialize_session_state():
@@ -57,30 +79,138 @@ def initialize_session_state():
             {"role": "assistant", "content": "Hello! I am Seseedy. Ask me about seeds, planting guides, or how to use this website!"}
         ]
 
+# --- 2b. INVENTORY CONTEXT CACHE ---
+# The prompt's inventory section is rebuilt only when the catalog version changes
+# (catalog.bump_catalog_version), and only the products relevant to the question are sent.
+INVENTORY_FULL_LIST = 20  # Catalogs up to this size are always listed in full
+INVENTORY_TOP_K = 8       # Otherwise: most product lines included in one prompt
+# Words that say what is asked, not which product it is about
+_QUERY_WORDS = {"how", "much", "many", "have", "price", "cost", "stock", "sell"}
+_inventory_lock = threading.Lock()
+_inventory_cache = None  # (catalog version, inventory)
+
+def _keywords(text):
+    """
+    Content words (utils.content_words) used to match questions to products.
+    """
+    return set(content_words(text)) - _QUERY_WORDS
+
+def get_inventory():
+    """
+    Prompt-ready inventory for the current catalog version: one line per product id, keyword sets
+    (name, category and description, which carries local names like "water spinach"), a
+    one-line-per-category summary, and a fingerprint of the lines (the response cache scope,
+    stable across restarts unlike the in-process catalog version).
+    """
+    global _inventory_cache
+    version = catalog.get_catalog_version()
+    cached = _inventory_cache
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    products = catalog.load_products_from_db()
+    categories = {}
+    for p in products:
+        categories.setdefault(p["category"], []).append(p["price"])
+    lines = {p["id"]: f"- {p['name']}: RM {p['price']:.2f} ({p['category']}) - {p['stock']} in stock" for p in products}
+    inventory = {
+        "lines": lines,
+        "keywords": {p["id"]: _keywords(f"{p['name']} {p['category']} {p['description'] or ''}") for p in products},
+        "categories": "\n".join(
+            f"- {cat}: {len(prices)} products, RM {min(prices):.2f} - {max(prices):.2f}"
+            for cat, prices in sorted(categories.items())
+        ),
+        "fingerprint": hashlib.sha256("\n".join(lines.values()).encode()).hexdigest()[:16],
+    }
+    with _inventory_lock:
+        _inventory_cache = (version, inventory)
+    return inventory
+
+def _relevant_products(question, inventory, top_k):
+    """
+    Ids of up to top_k products the question is about, in catalog order: products it names
+    (fuzzy, as the router matches them: "kangkong", "wtermelon"), else the best keyword overlaps
+    with names and descriptions ("cili", "water spinach"), else the products of the category it names.
+    """
+    index = chat_router.get_index()
+    words = split_words(question)
+    named = [_keywords(p["name"]) for p in chat_router.match_products(words, index)]
+    # Every product carrying a named product's words, e.g. its "#2" variants
+    ids = [pid for pid, keywords in inventory["keywords"].items() if any(name <= keywords for name in named)]
+    if not ids:
+        topic = _keywords(question)
+        scores = {pid: len(topic & keywords) for pid, keywords in inventory["keywords"].items()}
+        ids = sorted((pid for pid, score in scores.items() if score > 0), key=lambda pid: -scores[pid])
+    if not ids:
+        category = chat_router.match_category(words, index)
+        ids = [p["id"] for p in index["products"] if p["category"] == category]
+    selected = set(ids[:top_k])
+    return [pid for pid in inventory["lines"] if pid in selected]
+
+def build_product_context(question, top_k=INVENTORY_TOP_K):
+    """
+    The prompt's inventory section, and whether it lists the whole catalog. Small catalogs
+    (INVENTORY_FULL_LIST) are listed in full; larger ones send the category summary plus
+    the top_k products most relevant to the question.
+    """
+    inventory = get_inventory()
+    lines = inventory["lines"]
+    if not lines:
+        return "Inventory is currently empty.", True
+    if len(lines) <= max(top_k, INVENTORY_FULL_LIST):
+        return "CURRENT INVENTORY & PRICES:\n" + "\n".join(lines.values()) + "\n", True
+
+    selected = [lines[pid] for pid in _relevant_products(question, inventory, top_k)]
+    context = f"PRODUCT CATEGORIES ({len(lines)} products in total):\n{inventory['categories']}\n"
+    if selected:
+        context += "CURRENT INVENTORY & PRICES (products matching the question):\n" + "\n".join(selected) + "\n"
+    return context, False
+
 # --- 3. AI ANSWER FUNCTION (UPDATED) ---
-def ask_ai(user_question):
+def ask_ai(user_question, stream=False):
+    """
+    Seseedy's answer to the question. With stream=True, returns a generator of text chunks
+    (for st.write_stream) that yields the LLM's reply as it is generated; local and cached
+    answers arrive as a single chunk.
+    """
+    chunks = _answer_chunks(user_question, stream)
+    return chunks if stream else "".join(chunks)
+
+def _answer_chunks(user_question, stream):
+    # 0. FAST PATH: price/stock/category lookups are answered from the catalog, no LLM call
+    local_answer = chat_router.route(user_question)
+    if local_answer is not None:
+        yield local_answer
+        return
+
+    # 0b. Answered before (same or reworded question, same inventory)
+    try:
+        cache_scope = get_inventory()["fingerprint"]
+        cached_answer = response_cache.lookup(user_question, cache_scope)
+    except Exception as e:
+        cache_scope, cached_answer = None, None
+    if cached_answer is not None:
+        yield cached_answer
+        return
+
+    model = get_model()
     if not model:
-        return "I am currently offline (API Key missing)."
+        yield "I am currently offline (API Key missing)."
+        return
     
-    # 1. FETCH PRODUCT DATA DYNAMICALLY
-    product_context = ""
+    # 1. FETCH PRODUCT DATA (cached per catalog version, only the relevant products)
     try:
-        conn = sqlite3.connect('database.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT name, price, category, stock FROM products")
-        products = cursor.fetchall()
-        conn.close()
-        
-        # Format the data into a readable string for the AI
-        if products:
-            product_list = "\n".join([f"- {p[0]}: RM {p[1]:.2f} ({p[2]}) - {p[3]} in stock" for p in products])
-            product_context = f"CURRENT INVENTORY & PRICES:\n{product_list}\n"
-        else:
-            product_context = "Inventory is currently empty."
-            
+        product_context, full_list = build_product_context(user_question)
     except Exception as e:
-        product_context = "Error retrieving inventory data."
+        product_context, full_list = "Error retrieving inventory data.", False
+    if full_list:
+        not_listed = "If the product is not in the list, say we don't carry it."
+    else:
+        # Only part of the catalog is in the prompt: an unlisted product may still be sold
+        not_listed = ("The list only shows part of our catalog. If the product is not in it, do not say we "
+                      "don't carry it; suggest searching the shop for it by name.")
 
+    parts = []
     try:
         # 2. UPDATE PROMPT WITH DATA
         prompt = f"""
@@ -97,30 +227,26 @@ def ask_ai(user_question):
         
         Instructions:
         - If the user asks for a price, LOOK at the 'CURRENT INVENTORY' list above and answer with the exact price in RM.
-        - If the product is not in the list, say we don't carry it.
+        - {not_listed}
         - Keep your answer helpful, short, and friendly.
         """
         
-        response = model.generate_content(prompt)
-        return response.text
+        start = time.perf_counter()
+        if stream:
+            for chunk in model.generate_content(prompt, stream=True):
+                parts.append(chunk.text)
+                yield chunk.text
+        else:
+            parts.append(model.generate_content(prompt).text)
+            yield parts[0]
+        chat_router.record_llm_call(time.perf_counter() - start)
+        # Only complete replies are cached (not errors or an abandoned stream)
+        if cache_scope is not None:
+            response_cache.store(user_question, cache_scope, "".join(parts))
     except Exception as e:
-        return f"Sorry, I'm having trouble thinking right now. (Error: {str(e)})"
+        separator = "\n\n" if parts else ""  # The stream broke off mid-reply
+        yield f"{separator}Sorry, I'm having trouble thinking right now. (Error: {str(e)})"
     
-# ==========================================
-# --- ADD THESE IMPORTS AT THE TOP ---
-# ==========================================
-import google.generativeai as genai
-import os
-# ... existing imports ...
-# NEW IMPORTS FOR VOICE:
-import speech_recognition as sr
-from gtts import gTTS
-import io
-import tempfile
-
-# ... (Your existing configure_gemini and ask_ai functions remain here) ...
-
-
 # ==========================================
 # --- ADD THESE NEW FUNCTIONS AT THE END ---
 # ==========================================
@@ -139,7 +265,7 @@ def transcribe_audio(audio_bytes):
         
         # 2. Convert to WAV using Pydub
         # This fixes the "doesn't understand" issue by ensuring the format is correct
-        sound = AudioSegment.from_file(audio_file) 
+        sound = pydub.AudioSegment.from_file(audio_file) 
         
         # 3. Export to a Wav buffer
         wav_buffer = io.BytesIO()
@@ -167,15 +293,54 @@ def transcribe_audio(audio_bytes):
             
     return text
 
+# --- VOICE REPLIES (cached, synthesized in the background) ---
+TTS_WORKERS = 2  # gTTS calls are network-bound; a small pool keeps them off the page's thread
+_tts_pool = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+_tts_lock = threading.Lock()
+_tts_jobs = {}  # audio key -> Future, while that text is being synthesized
+
 def text_to_speech_bytes(text, lang='en'):
     """
     Converts text to speech using gTTS and returns the audio data as bytes.
+    Identical text is served from audio_cache instead of being synthesized again.
     """
+    key = audio_cache.audio_key(text, lang)
+    cached = audio_cache.get(key)
+    if cached is not None:
+        return cached
+    return _synthesize(key, text, lang)
+
+def _synthesize(key, text, lang):
     try:
-        tts = gTTS(text=text, lang=lang, slow=False)
+        tts = gtts.gTTS(text=text, lang=lang, slow=False)
         mp3_fp = io.BytesIO()
         tts.write_to_fp(mp3_fp)
-        return mp3_fp.getvalue()
+        audio = mp3_fp.getvalue()
     except Exception as e:
         print(f"TTS Error: {e}")
-        return None
\ No newline at end of file
+        return None
+    try:
+        audio_cache.put(key, audio)
+    except OSError as e:
+        print(f"Audio cache not written: {e}")
+    return audio
+
+def text_to_speech_async(text, lang='en'):
+    """
+    Synthesizes text on the TTS pool (gTTS, then stored in audio_cache) and returns the
+    Future of its mp3 bytes (None if synthesis failed). Cached audio comes back as an already finished Future; the same text requested
+    again while it is being synthesized shares the running job.
+    """
+    key = audio_cache.audio_key(text, lang)
+    cached = audio_cache.get(key)
+    if cached is not None:
+        done = Future()
+        done.set_result(cached)
+        return done
+    with _tts_lock:
+        job = _tts_jobs.get(key)
+        if job is None:
+            job = _tts_pool.submit(_synthesize, key, text, lang)
+            _tts_jobs[key] = job
+            job.add_done_callback(lambda _: _tts_jobs.pop(key, None))
+    return job
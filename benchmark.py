@@ -0,0 +1,193 @@
+import argparse
+import os
+import pickle
+import subprocess
+import sys
+import time
+import numpy as np
+import ai_engine
+import forest_engine
+
+# --- MICRO-BENCHMARK: FOREST INFERENCE ---
+# Compares the served engine (forest_engine.CompactForest) with the sklearn pickle it was
+# exported from. sklearn is only needed for the comparison; without it only the compact
+# engine is timed.
+BATCH_SIZES = [1, 12, 156, 10000]
+
+def best_of(fn, repeat):
+    """
+    Best wall time of `repeat` calls, in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+def random_rows(forest, n, rng):
+    """
+    n feature rows like SeedAI builds: product id, month and the six month-derived flags.
+    """
+    prods = rng.integers(0, len(forest.classes), n)
+    months = rng.integers(1, 13, n)
+    ai = ai_engine.SeedAI.__new__(ai_engine.SeedAI)  # Only for get_context_flags
+    rows = []
+    for prod_id, month in zip(prods, months):
+        flags = ai.get_context_flags(int(month))
+        rows.append([prod_id, month, flags['is_monsoon'], flags['is_hot'], flags['is_holiday'],
+                     flags['is_cny'], flags['is_ramadan'], flags['is_deepavali']])
+    return np.array(rows, dtype=float)
+
+def bench_inference(repeat):
+    t0 = time.perf_counter()
+    forest = forest_engine.CompactForest(ai_engine.MODEL_DIR)
+    print(f"CompactForest load: {(time.perf_counter() - t0) * 1000:.1f} ms ({forest.n_trees} trees, depth {forest.max_depth})")
+
+    rf = None
+    if os.path.exists(ai_engine.MODEL_PATH):
+        try:
+            t0 = time.perf_counter()
+            with open(ai_engine.MODEL_PATH, 'rb') as f:
+                rf = pickle.load(f)
+            print(f"sklearn pickle load: {(time.perf_counter() - t0) * 1000:.1f} ms")
+        except ImportError:
+            print("sklearn not installed: timing the compact engine only")
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>8} {'compact ms':>12} {'sklearn ms':>12} {'speedup':>8}  identical")
+    for n in BATCH_SIZES:
+        X = random_rows(forest, n, rng)
+        compact_ms = best_of(lambda: forest.predict(X), repeat)
+        if rf is None:
+            print(f"{n:>8} {compact_ms:>12.3f}")
+            continue
+        sklearn_ms = best_of(lambda: rf.predict(X), repeat)
+        identical = np.array_equal(forest.predict(X), rf.predict(X))
+        print(f"{n:>8} {compact_ms:>12.3f} {sklearn_ms:>12.3f} {sklearn_ms / compact_ms:>7.1f}x  {identical}")
+
+    # End to end: the dashboard's full forecast (every product x month, with reasoning)
+    ai = ai_engine.SeedAI()
+    pairs = [(name, m) for name in ai.classes for m in range(1, 13)]
+    for mode in ai_engine.ATTRIBUTION_MODES:
+        ai.attribution = mode
+        ms = best_of(lambda: ai.predict_batch(pairs), repeat)
+        print(f"SeedAI.predict_batch({len(pairs)} pairs, {mode}): {ms:.2f} ms")
+
+# --- IMPORT-TIME PROFILE ---
+# Cold-start cost of each app module, measured in a fresh interpreter with `-X importtime`.
+# Heavy dependencies should only show up under the modules that really use them at import.
+IMPORT_MODULES = ["utils", "database", "catalog", "chat_router", "response_cache", "audio_cache", "backend",
+                  "login_view", "ai_engine", "data_gen", "app_supplier", "farmer_view", "app_main"]
+
+def import_profile(module):
+    """
+    Returns (total ms, [(cumulative ms, package), ...] of the module's direct imports), or
+    (None, error line) if it cannot be imported here. Interpreter startup is not counted.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if proc.returncode != 0:
+        lines = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        return None, lines[-1] if lines else "import failed"
+
+    # Children are printed before their parent, indented two more spaces per level
+    direct = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == 1:
+            direct.append((int(cumulative) / 1000, name.strip()))
+        elif level == 0:
+            if name.strip() == module:
+                return int(cumulative) / 1000, sorted(direct, reverse=True)
+            direct = []
+    return None, "module not found in the import trace"
+
+def bench_imports(top):
+    print(f"{'module':<14} {'import ms':>10}  heaviest imports")
+    for module in IMPORT_MODULES:
+        total_ms, detail = import_profile(module)
+        if total_ms is None:
+            print(f"{module:<14} {'n/a':>10}  {detail}")
+            continue
+        heaviest = ", ".join(f"{name} {ms:.0f}" for ms, name in detail[:top])
+        print(f"{module:<14} {total_ms:>10.1f}  {heaviest}")
+
+# --- CHAT ROUTER ---
+# Typical chatbot questions: the lookups should be answered locally, the rest fall through.
+ROUTER_QUESTIONS = [
+    "How much is watermelon?", "price of papaya seeds", "do you have sweet corn?",
+    "any chilli kulai in stock?", "what fruits do you sell?", "how much is kangkong",
+    "how to plant watermelon", "when should I harvest papaya", "what is the best fertilizer",
+    "do you sell tractors?",
+    # "how much" about something other than the price must reach the LLM
+    "how much fertilizer for papaya", "how much sunlight does cucumber need?",
+    "how much space does watermelon need", "how much seed per acre for sweet corn",
+    "How much do papaya trees yield?",
+]
+
+def bench_router(repeat):
+    import chat_router
+    chat_router.get_index()  # Build the catalog index outside the timing
+    per_question = best_of(lambda: [chat_router.route(q) for q in ROUTER_QUESTIONS], repeat) / len(ROUTER_QUESTIONS)
+    s = chat_router.stats()
+    print(f"chat_router.route: {per_question * 1000:.0f} us/question, "
+          f"{s['hit_rate']:.0%} answered locally ({len(ROUTER_QUESTIONS)} sample questions)")
+
+# --- RESPONSE CACHE ---
+# Lookup cost with a full cache: exact repeats and reworded questions (TF-IDF scan).
+# Runs against a throwaway database file, never the app's database.db.
+CACHE_SCOPE = "benchmark"
+
+def bench_cache(repeat):
+    import shutil
+    import tempfile
+    import database
+    import response_cache
+    crops = ["watermelon", "papaya", "chilli", "kangkong", "sweet corn", "okra", "brinjal", "cucumber"]
+    templates = ["when to plant {}", "how long for {} to grow", "how often should I water {}",
+                 "what soil is best for {}", "how to harvest {}", "can {} grow in pots"]
+    questions = [t.format(c) for c in crops for t in templates]
+
+    app_db_path = database.DB_PATH
+    tmp_dir = tempfile.mkdtemp(prefix="seseed-bench-")
+    database.close_all()
+    database.DB_PATH = os.path.join(tmp_dir, "bench.db")
+    try:
+        with database.connection() as conn:
+            cache_migration = next(m for m in database.MIGRATIONS if any(isinstance(sql, str) and "chat_cache" in sql for sql in m))
+            for sql in cache_migration:
+                conn.execute(sql)
+        for i, q in enumerate(questions):
+            response_cache.store(q, CACHE_SCOPE, f"answer {i}")
+        exact = best_of(lambda: [response_cache.lookup(q, CACHE_SCOPE) for q in questions], repeat) / len(questions)
+        reworded = [q.replace("when to", "when should I").upper() + "?" for q in questions]
+        near = best_of(lambda: [response_cache.lookup(q, CACHE_SCOPE) for q in reworded], repeat) / len(questions)
+        print(f"response_cache.lookup ({len(questions)} cached): {exact * 1000:.0f} us exact, {near * 1000:.0f} us reworded")
+    finally:
+        response_cache.clear()  # In-memory entries and the throwaway table
+        database.close_all()
+        database.DB_PATH = app_db_path
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the app's hot paths.")
+    parser.add_argument("suite", nargs="?", choices=["all", "inference", "router", "cache", "imports"], default="all")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement (best is reported).")
+    parser.add_argument("--top", type=int, default=4, help="Heaviest imports listed per module.")
+    args = parser.parse_args()
+    if args.suite in ("all", "inference"):
+        bench_inference(args.repeat)
+    if args.suite in ("all", "router"):
+        bench_router(args.repeat)
+    if args.suite in ("all", "cache"):
+        bench_cache(args.repeat)
+    if args.suite in ("all", "imports"):
+        if args.suite == "all":
+            print()
+        bench_imports(args.top)
@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+import database
+import image_store
+
+# Reading side of the product catalog. Seeding lives in data_gen; importing this module
+# (or reading products) never touches image files or the generator's dependencies.
+
+# --- 1. FUNCTION TO READ DATA ---
+def _read_products_from_db():
+    """
+    Reads all products from the database and returns them as a list of dictionaries.
+    Images are returned as static URLs ('image', 'image_seed', 'image_tree'), never as file contents,
+    plus their size variants under 'image_variants' (see image_store.pick_url).
+    """
+    with database.connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+
+        cursor.execute("""
+            SELECT id, name, category, price, stock, days_to_grow, peak_month,
+                   image_id, image_seed_id, image_tree_id, description
+            FROM products
+        """)
+        rows = cursor.fetchall()
+        variants = image_store.load_variants(conn.cursor())
+
+    products = []
+    for row in rows:
+        prod = dict(row)
+        prod["image_variants"] = {}
+        for key in ("image", "image_seed", "image_tree"):
+            prod[key] = image_store.image_url(prod[f"{key}_id"])
+            prod["image_variants"][key] = variants.get(prod[f"{key}_id"], [])
+        products.append(prod)
+
+    return products
+
+# --- 2. CATALOG CACHE ---
+# Process-wide copy of the catalog, valid for one catalog version.
+# Every write to the products table must call bump_catalog_version().
+_catalog_lock = threading.Lock()
+_catalog_version = 0
+_catalog_cache = None  # (version, products)
+
+def get_catalog_version():
+    """
+    Current catalog version (bumped on every write to products).
+    """
+    return _catalog_version
+
+def bump_catalog_version():
+    """
+    Marks the cached catalog as stale; the next load_products_from_db() re-reads the database.
+    """
+    global _catalog_version
+    with _catalog_lock:
+        _catalog_version += 1
+
+def load_products_from_db():
+    """
+    Returns the product catalog, served from memory until the catalog version changes.
+    Callers get their own list of dicts, so they may modify them freely.
+    """
+    global _catalog_cache
+    with _catalog_lock:
+        version = _catalog_version
+        cached = _catalog_cache
+    if cached is None or cached[0] != version:
+        products = _read_products_from_db()
+        cached = (version, products)
+        with _catalog_lock:
+            # Keep the newest snapshot if another thread refreshed meanwhile
+            if _catalog_cache is None or _catalog_cache[0] <= version:
+                _catalog_cache = cached
+    return [dict(prod) for prod in cached[1]]
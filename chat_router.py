@@ -0,0 +1,198 @@
+import difflib
+import re
+import threading
+import time
+import catalog
+from utils import split_words, stem
+
+# --- LOCAL INTENT ROUTER ---
+# Answers "how much is X" / "do you have Y" / "what fruits do you sell" straight from the
+# catalog. Anything open-ended (planting advice, comparisons, chit-chat) returns None and
+# goes to the LLM as before. A question is only a lookup if every word is either a product
+# (or category) word or one of the intent's LOOKUP_WORDS: "how much sunlight does cucumber
+# need" is not a price question.
+MAX_WORDS = 14          # Longer questions are rarely a plain lookup
+NAME_CUTOFF = 0.8       # difflib similarity needed for a product name match (typos allowed)
+CATEGORY_CUTOFF = 0.85
+
+OPEN_ENDED = re.compile(
+    r"\b(how (do|to|should|can|long|often)|when|why|plant|planting|grow|growing|harvest|water|"
+    r"fertili[sz](e|er|ers|ing)|soil|tips?|guide|recommend|best|better|compare|difference|vs|"
+    r"cheaper|cheapest|expensive|more|less|healthy|health|benefits?|nutrition|nutritious|vitamins?|"
+    r"colou?r|taste|tastes|size|eat|cook|cooking|recipe)\b"
+)
+INTENTS = [
+    ("price", re.compile(r"\b(how much|price|prices|pricing|cost|costs|rm)\b")),
+    ("stock", re.compile(r"\b(do you (have|sell|carry)|in stock|stock|available|availability|left)\b")),
+    ("category", re.compile(r"\b(what|which|list|show)\b")),
+]
+_FILLER = {"seed", "seeds", "the", "a", "an", "of", "for", "is", "are", "do", "you", "have", "how", "much"}
+_COMMON = _FILLER | {"what", "s", "does", "your", "me", "please", "tell", "any", "some", "i", "we", "can", "get"}
+LOOKUP_WORDS = {
+    "price": _COMMON | {"price", "prices", "pricing", "cost", "costs", "rm", "per", "packet", "pack", "each", "one"},
+    "stock": _COMMON | {"sell", "carry", "in", "stock", "available", "availability", "left", "there", "still",
+                        "got", "many"},
+    "category": _COMMON | {"which", "list", "show", "all", "sell", "carry", "kind", "kinds", "type", "types",
+                           "there", "available", "in", "stock", "got", "offer"},
+}
+
+# --- CATALOG INDEX (rebuilt per catalog version) ---
+_index_lock = threading.Lock()
+_index_cache = None  # (catalog version, index)
+
+def get_index():
+    """
+    Name aliases -> products and category aliases -> category for the current catalog version.
+    "Honeydew Seeds (Jade Dew)" is reachable as "honeydew", "honeydew seeds" and "jade dew".
+    """
+    global _index_cache
+    version = catalog.get_catalog_version()
+    cached = _index_cache
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    products = catalog.load_products_from_db()
+    names, categories = {}, {}
+    for p in products:
+        base, _, alias = p["name"].partition("(")
+        for variant in (p["name"], base, alias.rstrip(")")):
+            words = [w for w in split_words(variant) if w not in _FILLER]
+            if words:
+                names.setdefault(" ".join(words), []).append(p)
+        category_words = [stem(w) for w in split_words(p["category"])]
+        categories[" ".join(category_words)] = p["category"]
+        categories.setdefault(category_words[0], p["category"])  # "fruiting" -> Fruiting Veg
+
+    index = {
+        "names": names,
+        "categories": categories,
+        "products": products,
+        "name_words": sorted({w for alias in names for w in alias.split()}),
+        "category_words": sorted({w for alias in categories for w in alias.split()}),
+    }
+    with _index_lock:
+        _index_cache = (version, index)
+    return index
+
+def _ngrams(words, max_len=3):
+    for size in range(max_len, 0, -1):
+        for i in range(len(words) - size + 1):
+            yield " ".join(words[i:i + size])
+
+def match_products(words, index):
+    """
+    Products named in the question (fuzzy, longest phrases first), in catalog order.
+    """
+    found = {}
+    aliases = list(index["names"])
+    for gram in _ngrams([w for w in words if w not in _FILLER]):
+        for alias in difflib.get_close_matches(gram, aliases, n=1, cutoff=NAME_CUTOFF):
+            for p in index["names"][alias]:
+                found[p["id"]] = p
+    return [p for p in index["products"] if p["id"] in found]
+
+def match_category(words, index):
+    aliases = list(index["categories"])
+    for gram in _ngrams([stem(w) for w in words], max_len=2):
+        match = difflib.get_close_matches(gram, aliases, n=1, cutoff=CATEGORY_CUTOFF)
+        if match:
+            return index["categories"][match[0]]
+    return None
+
+def is_plain_lookup(words, intent, known_words):
+    """
+    True if every word of the question is one of the intent's LOOKUP_WORDS or (fuzzily)
+    one of `known_words`, the product or category words it was matched against.
+    """
+    vocabulary = LOOKUP_WORDS[intent]
+    return all(
+        w in vocabulary or difflib.get_close_matches(stem(w), known_words, n=1, cutoff=NAME_CUTOFF)
+        for w in words
+    )
+
+# --- ANSWERS ---
+def _price_answer(products):
+    return "\n".join(f"{p['name']} cost RM {p['price']:.2f} per packet." for p in products)
+
+def _stock_answer(products):
+    lines = []
+    for p in products:
+        if p["stock"] > 0:
+            lines.append(f"Yes, we have {p['name']} in stock ({p['stock']} available) at RM {p['price']:.2f}.")
+        else:
+            lines.append(f"Sorry, {p['name']} are currently out of stock.")
+    return "\n".join(lines)
+
+def _category_answer(category, index):
+    items = [p for p in index["products"] if p["category"] == category]
+    listing = ", ".join(f"{p['name']} (RM {p['price']:.2f})" for p in items)
+    return f"Our {category} seeds: {listing}."
+
+# --- COUNTERS ---
+_stats_lock = threading.Lock()
+_stats = {"questions": 0, "answered": 0, "price": 0, "stock": 0, "category": 0,
+          "local_seconds": 0.0, "llm_calls": 0, "llm_seconds": 0.0}
+
+def _count(**increments):
+    with _stats_lock:
+        for key, value in increments.items():
+            _stats[key] += value
+
+def record_llm_call(seconds):
+    """
+    Called by backend after every LLM round trip, to estimate what the router saves.
+    """
+    _count(llm_calls=1, llm_seconds=seconds)
+
+def stats():
+    """
+    Hit rate plus the LLM calls and latency the router avoided (at the average LLM latency seen).
+    """
+    with _stats_lock:
+        s = dict(_stats)
+    s["hit_rate"] = s["answered"] / s["questions"] if s["questions"] else 0.0
+    avg_llm = s["llm_seconds"] / s["llm_calls"] if s["llm_calls"] else None
+    s["avg_local_ms"] = s["local_seconds"] / s["questions"] * 1000 if s["questions"] else 0.0
+    s["avg_llm_ms"] = avg_llm * 1000 if avg_llm is not None else None
+    s["llm_calls_avoided"] = s["answered"]
+    s["est_seconds_saved"] = s["answered"] * avg_llm if avg_llm is not None else None
+    return s
+
+# --- ROUTER ---
+def route(question):
+    """
+    Answers a price/stock/category question from the catalog, or returns None for the LLM.
+    """
+    start = time.perf_counter()
+    answer, intent = _route(question)
+    elapsed = time.perf_counter() - start
+    if answer is None:
+        _count(questions=1, local_seconds=elapsed)
+    else:
+        _count(questions=1, answered=1, local_seconds=elapsed, **{intent: 1})
+    return answer
+
+def _route(question):
+    text = question.lower()
+    words = split_words(text)
+    if not words or len(words) > MAX_WORDS or OPEN_ENDED.search(text):
+        return None, None
+
+    intent = next((name for name, pattern in INTENTS if pattern.search(text)), None)
+    if intent is None:
+        return None, None
+
+    index = get_index()
+    products = match_products(words, index)
+    if products:
+        # "what/which ..." about a named product is a real question for the LLM
+        if intent == "price" and is_plain_lookup(words, intent, index["name_words"]):
+            return _price_answer(products), intent
+        if intent == "stock" and is_plain_lookup(words, intent, index["name_words"]):
+            return _stock_answer(products), intent
+        return None, None
+
+    category = match_category(words, index)
+    if category and is_plain_lookup(words, "category", index["category_words"]):
+        return _category_answer(category, index), "category"
+    return None, None  # Unknown product: let the LLM say we don't carry it
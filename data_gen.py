@@ -1,93 +1,59 @@
-import sqlite3
-import random
 import os
-import base64
-from datetime import datetime, timedelta
+import argparse
+import zlib
+import time
+import numpy as np
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import catalog
+import database
+import image_store
 
 # --- CONFIGURATION ---
-DB_PATH = "database.db"
+DB_PATH = database.DB_PATH
+IMAGE_SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
 START_DATE = datetime(2023, 1, 1) # 3 Years of Data
-DAYS_TO_GENERATE = 365 * 3
+YEARS_TO_GENERATE = 3
+DAYS_TO_GENERATE = 365 * YEARS_TO_GENERATE
 
-# Fallback image (Online URL to prevent crashes if local files missing)
-seed_packet_image_url = "https://images.unsplash.com/photo-1523301343968-6a6ebf63c672?w=400"
+# Benchmark-scale datasets: variants per product template x years x stores.
+# Row counts are approximate (12 templates, ~1 sale row per product/store/day).
+SCALE_PRESETS = {
+    "1m":   {"variants": 23,  "years": 10, "stores": 1},   # ~1.0M sales rows
+    "10m":  {"variants": 46,  "years": 10, "stores": 5},   # ~10M sales rows
+    "100m": {"variants": 115, "years": 10, "stores": 20},  # ~100M sales rows
+}
 
 # --- 1. IMAGE HELPER FUNCTIONS ---
-def get_base64_of_bin_file(filename):
+def read_image_file(filename):
     """
-    Reads a local image file from the 'images' folder and converts it to base64.
+    Reads a local image file from the 'images' folder and returns its raw bytes.
+    Missing files return None (the product then shows image_store's fallback image).
     """
-    # FIX: Look inside the 'images' folder
-    bin_file = os.path.join("images", filename)
+    bin_file = os.path.join(IMAGE_SOURCE_DIR, filename)
     
     if os.path.exists(bin_file):
         with open(bin_file, 'rb') as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
+            return f.read()
+    print(f"Image not found: {bin_file}")
     return None
 
-def get_img(local_data, fallback_url):
+def ingest_images(cursor, prod):
     """
-    Returns the base64 string if available, otherwise the fallback URL.
+    Reads a product's packet/seed/tree image files and puts them into the content-addressed image store.
+    Returns the image ids keyed like the products table columns.
     """
-    if local_data:
-        return f"data:image/png;base64,{local_data}"
-    return fallback_url
-
-# --- 2. LOAD LOCAL IMAGES ---
-print("Loading local images from 'images/' folder...")
-
-# Make sure your filenames in the 'images' folder match these exactly!
-local_kangkung_img = get_base64_of_bin_file("kangkung.png")
-local_ks_img = get_base64_of_bin_file("ks.png") 
-local_kt_img = get_base64_of_bin_file("kt.png") 
-
-local_sawi_img = get_base64_of_bin_file("sawihijau.png") 
-local_shs_img = get_base64_of_bin_file("shs.png") 
-local_sht_img = get_base64_of_bin_file("sht.png") 
-
-local_cili_img = get_base64_of_bin_file("cilikulai.png")
-local_cks_img = get_base64_of_bin_file("cks.png") 
-local_ckt_img = get_base64_of_bin_file("ckt.png") 
-
-local_cucumber_img = get_base64_of_bin_file("cucumber.png")
-local_cs_img = get_base64_of_bin_file("cs.png") 
-local_ct_img = get_base64_of_bin_file("ct.png") 
-
-local_sweetcorn_img = get_base64_of_bin_file("sweetcorn.png")
-local_scs_img = get_base64_of_bin_file("scs.png") 
-local_sct_img = get_base64_of_bin_file("sct.png") 
-
-local_orka_img = get_base64_of_bin_file("orka.png")
-local_os_img = get_base64_of_bin_file("os.png") 
-local_ot_img = get_base64_of_bin_file("ot.png") 
-
-local_bittergourd_img = get_base64_of_bin_file("bittergourd.png")
-local_bgs_img = get_base64_of_bin_file("bgs.png") 
-local_bgt_img = get_base64_of_bin_file("bgt.png") 
-
-local_longbean_img = get_base64_of_bin_file("longbean.png")
-local_lbs_img = get_base64_of_bin_file("lbs.png")
-local_lbt_img = get_base64_of_bin_file("lbt.png")
-
-local_eggplant_img = get_base64_of_bin_file("eggplant.png")
-local_es_img = get_base64_of_bin_file("es.png")
-local_et_img = get_base64_of_bin_file("et.png")
-
-local_watermelon_img = get_base64_of_bin_file("watermelon.png")
-local_ws_img = get_base64_of_bin_file("ws.png") 
-local_wt_img = get_base64_of_bin_file("wt.png") 
-
-local_papaya_img = get_base64_of_bin_file("papaya.png")
-local_ps_img = get_base64_of_bin_file("ps.png") 
-local_pt_img = get_base64_of_bin_file("pt.png") 
-
-local_honeydew_img = get_base64_of_bin_file("honeydew.png")
-local_hds_img = get_base64_of_bin_file("hds.png") 
-local_hdt_img = get_base64_of_bin_file("hdt.png") 
-
+    ids = {}
+    for key in ("image", "image_seed", "image_tree"):
+        data = read_image_file(prod[key]) if prod[key] else None
+        ids[f"{key}_id"] = image_store.put_image(cursor, data, prod["name"]) if data else None
+    return ids
 
 # --- 3. THE MERGED PRODUCT LIST (12 ITEMS) ---
+# Declarative manifest: image fields name files in IMAGE_SOURCE_DIR. They are only read when
+# generate_data() ingests them into the image store, never when this module is imported.
 products_list = [
     # --- LEAFY GREENS ---
     {
@@ -97,9 +63,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 25, 
         "peak_harvest_month": 0, 
-        "image": get_img(local_kangkung_img, seed_packet_image_url),
-        "image_seed": get_img(local_ks_img, seed_packet_image_url),
-        "image_tree": get_img(local_kt_img, seed_packet_image_url),
+        "image": "kangkung.png",
+        "image_seed": "ks.png",
+        "image_tree": "kt.png",
         "desc": "High-yield water spinach. Harvest as early as 21 days."
     },
     {
@@ -109,9 +75,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 30, 
         "peak_harvest_month": 0, 
-        "image": get_img(local_sawi_img, seed_packet_image_url),
-        "image_seed": get_img(local_shs_img, seed_packet_image_url),
-        "image_tree": get_img(local_sht_img, seed_packet_image_url),
+        "image": "sawihijau.png",
+        "image_seed": "shs.png",
+        "image_tree": "sht.png",
         "desc": "Flowering White Cabbage. Rich in vitamins."
     },
 
@@ -123,9 +89,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 90, 
         "peak_harvest_month": 4, 
-        "image": get_img(local_cili_img, seed_packet_image_url),
-        "image_seed": get_img(local_cks_img, seed_packet_image_url),
-        "image_tree": get_img(local_ckt_img, seed_packet_image_url),
+        "image": "cilikulai.png",
+        "image_seed": "cks.png",
+        "image_tree": "ckt.png",
         "desc": "Premium Cili Kulai grade. Glossy red skin."
     },
 
@@ -137,9 +103,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 45, 
         "peak_harvest_month": 11, 
-        "image": get_img(local_cucumber_img, seed_packet_image_url),
-        "image_seed": get_img(local_cs_img, seed_packet_image_url),
-        "image_tree": get_img(local_ct_img, seed_packet_image_url),
+        "image": "cucumber.png",
+        "image_seed": "cs.png",
+        "image_tree": "ct.png",
         "desc": "Crisp, juicy local cucumber."
     },
     {
@@ -149,9 +115,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 70, 
         "peak_harvest_month": 12, 
-        "image": get_img(local_sweetcorn_img, seed_packet_image_url),
-        "image_seed": get_img(local_scs_img, seed_packet_image_url),
-        "image_tree": get_img(local_sct_img, seed_packet_image_url),
+        "image": "sweetcorn.png",
+        "image_seed": "scs.png",
+        "image_tree": "sct.png",
         "desc": "Honey Gold Sweet Corn. High sugar content."
     },
     {
@@ -161,9 +127,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 60, 
         "peak_harvest_month": 0, 
-        "image": get_img(local_orka_img, seed_packet_image_url),
-        "image_seed": get_img(local_os_img, seed_packet_image_url),
-        "image_tree": get_img(local_ot_img, seed_packet_image_url),
+        "image": "orka.png",
+        "image_seed": "os.png",
+        "image_tree": "ot.png",
         "desc": "Lady's Finger (Bendi). Heat tolerant."
     },
     {
@@ -173,9 +139,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 65, 
         "peak_harvest_month": 0, 
-        "image": get_img(local_bittergourd_img, seed_packet_image_url),
-        "image_seed": get_img(local_bgs_img, seed_packet_image_url),
-        "image_tree": get_img(local_bgt_img, seed_packet_image_url),
+        "image": "bittergourd.png",
+        "image_seed": "bgs.png",
+        "image_tree": "bgt.png",
         "desc": "Peria Katak. Medicinal properties."
     },
     {
@@ -185,9 +151,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 55, 
         "peak_harvest_month": 0, 
-        "image": get_img(local_longbean_img, seed_packet_image_url),
-        "image_seed": get_img(local_lbs_img, seed_packet_image_url),
-        "image_tree": get_img(local_lbt_img, seed_packet_image_url),
+        "image": "longbean.png",
+        "image_seed": "lbs.png",
+        "image_tree": "lbt.png",
         "desc": "Yardlong Bean. Produces pods up to 70cm."
     },
     {
@@ -197,9 +163,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 70, 
         "peak_harvest_month": 8, 
-        "image": get_img(local_eggplant_img, seed_packet_image_url),
-        "image_seed": get_img(local_es_img, seed_packet_image_url),
-        "image_tree": get_img(local_et_img, seed_packet_image_url),
+        "image": "eggplant.png",
+        "image_seed": "es.png",
+        "image_tree": "et.png",
         "desc": "Long Brinjal. Soft creamy flesh."
     },
 
@@ -211,9 +177,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 80, 
         "peak_harvest_month": 6, 
-        "image": get_img(local_watermelon_img, seed_packet_image_url),
-        "image_seed": get_img(local_ws_img, seed_packet_image_url),
-        "image_tree": get_img(local_wt_img, seed_packet_image_url),
+        "image": "watermelon.png",
+        "image_seed": "ws.png",
+        "image_tree": "wt.png",
         "desc": "Red Sweet Dragon. High sweetness."
     },
     {
@@ -223,9 +189,9 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 240, 
         "peak_harvest_month": 0, 
-        "image": get_img(local_papaya_img, seed_packet_image_url),
-        "image_seed": get_img(local_ps_img, seed_packet_image_url),
-        "image_tree": get_img(local_pt_img, seed_packet_image_url),
+        "image": "papaya.png",
+        "image_seed": "ps.png",
+        "image_tree": "pt.png",
         "desc": "Exotica Papaya. Sweet orange-red flesh."
     },
     {
@@ -235,66 +201,212 @@ products_list = [
         "stock": 1000,
         "days_to_grow": 85, 
         "peak_harvest_month": 3, 
-        "image": get_img(local_honeydew_img, seed_packet_image_url),
-        "image_seed": get_img(local_hds_img, seed_packet_image_url),
-        "image_tree": get_img(local_hdt_img, seed_packet_image_url),
+        "image": "honeydew.png",
+        "image_seed": "hds.png",
+        "image_tree": "hdt.png",
         "desc": "Premium Jade Dew. Emerald green flesh."
     }
 ]
 
-# --- 4. CULTURAL LOGIC ---
-def get_context_multiplier(prod, current_date, flags):
+# --- 4. CULTURAL LOGIC (VECTORIZED) ---
+FLAG_COLUMNS = ("is_monsoon", "is_hot", "is_holiday", "is_cny", "is_ramadan", "is_deepavali")
+
+def build_calendar(start_date, days):
     """
-    Calculates sales multiplier based on cultural and weather flags.
+    Returns (dates, years, months) arrays covering `days` consecutive days from start_date.
     """
-    m = 1.0
-    (monsoon, hot, holiday, cny, ramadan, deepavali) = flags
-    
+    dates = np.datetime64(start_date.date(), "D") + np.arange(days)
+    years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    months = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    return dates, years, months
+
+def get_season_flags(months):
+    """
+    Malaysian season/festival flags for an array of months.
+    Returns a (6, days) int array in FLAG_COLUMNS order.
+    """
+    return np.stack([
+        np.isin(months, [11, 12]),  # monsoon
+        np.isin(months, [3, 4, 5]), # hot
+        np.isin(months, [2, 12]),   # holiday
+        np.isin(months, [1, 2]),    # cny
+        months == 3,                # ramadan
+        months == 10,               # deepavali
+    ]).astype(np.int8)
+
+def get_context_multipliers(products, dates, years, months, flags, rng):
+    """
+    Calculates the (products x days) sales multiplier grid from cultural and weather flags.
+    Every random factor is drawn from `rng`, only for the cells where its rule applies.
+    """
+    m = np.ones((len(products), len(dates)))
+    (monsoon, hot, holiday, cny, ramadan, deepavali) = flags.astype(bool)
+
+    def products_where(rule):
+        return np.array([rule(p) for p in products], dtype=bool)[:, None]
+
+    def apply(mask, low, high=None):
+        mask = np.broadcast_to(mask, m.shape)
+        if high is None:
+            m[mask] *= low
+        else:
+            m[mask] *= rng.uniform(low, high, size=np.count_nonzero(mask))
+
     # 1. WEATHER IMPACTS
-    if monsoon: 
-        m *= random.uniform(0.4, 0.6) 
-        if "Kangkung" in prod["name"]: m *= 0.8 
-    if hot and prod["cat"] == "Fruit": m *= random.uniform(1.5, 2.0)
+    apply(monsoon[None, :], 0.4, 0.6)
+    apply(monsoon & products_where(lambda p: "Kangkung" in p["name"]), 0.8)
+    apply(hot & products_where(lambda p: p["cat"] == "Fruit"), 1.5, 2.0)
 
     # 2. CULTURAL IMPACTS
-    if cny and prod["cat"] in ["Leafy Greens", "Fruit"]: 
-        m *= random.uniform(1.8, 2.4)
-    
-    if ramadan:
-        if "Watermelon" in prod["name"]: m *= random.uniform(2.2, 3.2)
-        if "Cucumber" in prod["name"] or "Chilli" in prod["name"]: m *= random.uniform(1.5, 2.0)
+    apply(cny & products_where(lambda p: p["cat"] in ["Leafy Greens", "Fruit"]), 1.8, 2.4)
 
-    if deepavali:
-        if any(x in prod["name"] for x in ["Okra", "Eggplant", "Bitter Gourd", "Long Bean"]): 
-            m *= random.uniform(2.2, 3.0)
-        elif "Chilli" in prod["name"]: 
-            m *= random.uniform(1.8, 2.5)
+    apply(ramadan & products_where(lambda p: "Watermelon" in p["name"]), 2.2, 3.2)
+    apply(ramadan & products_where(lambda p: "Cucumber" in p["name"] or "Chilli" in p["name"]), 1.5, 2.0)
+
+    deepavali_veg = products_where(lambda p: any(x in p["name"] for x in ["Okra", "Eggplant", "Bitter Gourd", "Long Bean"]))
+    apply(deepavali & deepavali_veg, 2.2, 3.0)
+    apply(deepavali & ~deepavali_veg & products_where(lambda p: "Chilli" in p["name"]), 1.8, 2.5)
 
     # 3. HOLIDAY & GROWTH
-    if holiday and ("Corn" in prod["name"] or "Melon" in prod["name"]): 
-        m *= random.uniform(1.3, 1.6)
-
-    # Smart Seasonality (Growth Cycle)
-    if prod["peak_harvest_month"] != 0:
-        target_harvest = datetime(current_date.year, prod["peak_harvest_month"], 15)
-        if current_date.month > prod["peak_harvest_month"]:
-            target_harvest = target_harvest.replace(year=current_date.year + 1)
-        ideal_planting = target_harvest - timedelta(days=prod["days_to_grow"])
-        delta = abs((current_date - ideal_planting).days)
-        if delta > 182: delta = 365 - delta
-        if delta < 30: m *= 2.5 
-        
+    apply(holiday & products_where(lambda p: "Corn" in p["name"] or "Melon" in p["name"]), 1.3, 1.6)
+
+    # Smart Seasonality (Growth Cycle): boost days within 30 days of the ideal planting date.
+    # Only depends on (peak month, days to grow), so it is computed once per distinct pair.
+    day_num = dates.astype(np.int64)
+    # Month starts from the first month of the span to the December after the last year's
+    # (a peak month already past in the last year targets next year's harvest)
+    first_month = (years[0] - 1970) * 12
+    month_starts = np.arange(first_month, (years[-1] - 1970) * 12 + 24).astype("datetime64[M]")
+    month_starts = month_starts.astype("datetime64[D]").astype(np.int64)
+    cycles = np.array([(p["peak_harvest_month"], p["days_to_grow"]) for p in products]).reshape(-1, 2)
+    unique_cycles, cycle_idx = np.unique(cycles, axis=0, return_inverse=True)
+    in_window = np.zeros((len(unique_cycles), len(dates)), dtype=bool)
+    for i, (peak, grow) in enumerate(unique_cycles):
+        if peak == 0:
+            continue
+        target_month = (years - 1970) * 12 + (months > peak) * 12 + (peak - 1)
+        target_harvest = month_starts[target_month - first_month] + 14
+        delta = np.abs(day_num - (target_harvest - grow))
+        delta = np.where(delta > 182, 365 - delta, delta)
+        in_window[i] = delta < 30
+    apply(in_window[cycle_idx.ravel()], 2.5)
+
     return m
 
-def generate_data():
-    conn = sqlite3.connect(DB_PATH)
+def generate_sales_history(products, start_date=START_DATE, days=DAYS_TO_GENERATE, rng=None):
+    """
+    Builds the whole product x day sales grid in one pass.
+    Returns (date strings, (6, days) flags, (products, days) quantities).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    dates, years, months = build_calendar(start_date, days)
+    flags = get_season_flags(months)
+    m = get_context_multipliers(products, dates, years, months, flags, rng)
+    quantities = (rng.integers(20, 41, size=m.shape) * m).astype(np.int32)
+    return np.datetime_as_string(dates, unit="D"), flags, quantities
+
+# Random stream domains: keeps e.g. variant #2's jitter and store 2's history on different streams
+VARIANT_STREAM = 1
+STORE_STREAM = 2
+
+# Products per history job: each job is one vectorised grid per store, and the unit handed to
+# worker processes. Fixed, so the generated data does not depend on --workers.
+HISTORY_BLOCK = 64
+
+def product_seed(seed, name, *extra):
+    """
+    Per-product seed derived from the run seed and the product name (plus a stream domain and
+    e.g. a variant number), so a clone's jitter never depends on catalog order.
+    """
+    return np.random.SeedSequence([seed, zlib.crc32(name.encode("utf-8")), *extra])
+
+def expand_catalog(templates, variants, seed):
+    """
+    Clones every product template into `variants` products for scale testing.
+    Variant 1 is the template itself; the others get a jittered price, growth days and peak month.
+    """
+    catalog = []
+    for prod in templates:
+        catalog.append(prod)
+        for v in range(2, variants + 1):
+            rng = np.random.default_rng(product_seed(seed, prod["name"], VARIANT_STREAM, v))
+            clone = dict(prod)
+            clone["name"] = f"{prod['name']} #{v}"
+            clone["price"] = round(prod["price"] * rng.uniform(0.85, 1.15), 2)
+            clone["days_to_grow"] = max(15, int(round(prod["days_to_grow"] * rng.uniform(0.9, 1.1))))
+            if prod["peak_harvest_month"] != 0:
+                clone["peak_harvest_month"] = (prod["peak_harvest_month"] - 1 + int(rng.integers(-1, 2))) % 12 + 1
+            catalog.append(clone)
+    return catalog
+
+def generate_block_history(job):
+    """
+    Worker entry point: generates a block of products' (products, stores, days) quantity grid,
+    one generate_sales_history call (all products at once) per store.
+    `job` is (block number, product templates, run seed, start date, days, stores).
+    """
+    block, prods, seed, start_date, days, stores = job
+    grids = []
+    for store_id in range(1, stores + 1):
+        rng = np.random.default_rng(np.random.SeedSequence([seed, STORE_STREAM, block, store_id]))
+        _, _, quantities = generate_sales_history(prods, start_date, days, rng)
+        grids.append(quantities)
+    return np.stack(grids, axis=1)
+
+def _bounded_map(pool, fn, jobs, window):
+    """
+    pool.map that keeps at most `window` jobs submitted ahead of the consumer and yields results
+    in job order, so finished grids never pile up behind a slower writer.
+    """
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.submit(fn, job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _remove_db_files(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def generate_data(seed=None, workers=1, variants=1, years=YEARS_TO_GENERATE, stores=1, start_date=START_DATE):
+    """
+    Builds a fresh database next to DB_PATH and swaps it in only once it is complete,
+    so a failed run leaves the current database untouched.
+    """
+    database.close_all()
+    build_path = f"{DB_PATH}.building"
+    _remove_db_files(build_path)
+    # Private connection: the bulk loader changes journaling PRAGMAs on it
+    conn = database.open_connection(build_path)
+    try:
+        _build_database(conn, seed, workers, variants, years, stores, start_date)
+    except BaseException:
+        conn.close()
+        _remove_db_files(build_path)
+        raise
+    conn.close()  # Last connection: checkpoints and removes the build file's WAL
+
+    # The old WAL/SHM belong to the old file and must not be replayed onto the new one
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    os.replace(build_path, DB_PATH)
+    database.close_all()
+    catalog.bump_catalog_version()
+    print("--- SUCCESS: Database Created with Images (Packet, Seed, Tree) ---")
+
+def _build_database(conn, seed, workers, variants, years, stores, start_date):
     cursor = conn.cursor()
-    
+
     # --- 5. CLEAN SCHEMA (NO REVIEWS/RATINGS) ---
-    cursor.execute("DROP TABLE IF EXISTS sales_history")
-    cursor.execute("DROP TABLE IF EXISTS products")
-    
-    # PRODUCTS: Added 3 image columns
+    # IMAGES: Content-addressed store (+ thumb/medium variants), files are served from static/img
+    image_store.create_schema(cursor)
+
+    # PRODUCTS: 3 image references (packet, seed, tree) into the image store
     cursor.execute('''
         CREATE TABLE products (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -304,9 +416,9 @@ def generate_data():
             stock INTEGER,
             days_to_grow INTEGER, 
             peak_month INTEGER,
-            image TEXT,
-            image_seed TEXT,
-            image_tree TEXT,
+            image_id TEXT REFERENCES images(id),
+            image_seed_id TEXT REFERENCES images(id),
+            image_tree_id TEXT REFERENCES images(id),
             description TEXT
         )
     ''')
@@ -324,76 +436,135 @@ def generate_data():
             is_cny INTEGER,
             is_ramadan INTEGER,
             is_deepavali INTEGER,
+            store_id INTEGER DEFAULT 1,
             FOREIGN KEY(product_id) REFERENCES products(id)
         )
     ''')
 
-    print(f"Generating Database for {len(products_list)} Products (With 3 Image Columns)...")
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+        print(f"Using random seed {seed} (pass --seed to reproduce this run)")
+    # Images are stored once per template; variants share the template's image ids
+    templates = [dict(prod, **ingest_images(cursor, prod)) for prod in products_list]
+    products = expand_catalog(templates, variants, seed)
+    days = 365 * years
 
-    for prod in products_list:
+    print(f"Generating Database for {len(products)} Products x {years} Years x {stores} Stores (With 3 Image Columns)...")
+
+    product_ids = []
+    for prod in products:
         # Insert Product (No Ratings/Reviews)
         cursor.execute("""
             INSERT INTO products (
                 name, category, price, stock, days_to_grow, peak_month,
-                image, image_seed, image_tree, description
+                image_id, image_seed_id, image_tree_id, description
             ) 
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             prod["name"], prod["cat"], prod["price"], prod["stock"], prod["days_to_grow"], prod["peak_harvest_month"],
-            prod["image"], prod["image_seed"], prod["image_tree"], prod["desc"]
+            prod["image_id"], prod["image_seed_id"], prod["image_tree_id"], prod["desc"]
         ))
-        
-        product_id = cursor.lastrowid
-        curr = START_DATE
-        
-        # Generate History
-        for _ in range(DAYS_TO_GENERATE):
-            # Calculate Flags
-            monsoon = 1 if curr.month in [11, 12] else 0
-            hot = 1 if curr.month in [3, 4, 5] else 0
-            holiday = 1 if curr.month in [2, 12] else 0
-            cny = 1 if curr.month in [1, 2] else 0
-            ramadan = 1 if curr.month == 3 else 0
-            deepavali = 1 if curr.month == 10 else 0
-            
-            flags = (monsoon, hot, holiday, cny, ramadan, deepavali)
-            
-            m = get_context_multiplier(prod, curr, flags)
-            
-            qty = int(random.randint(20, 40) * m)
-            
-            if qty > 0:
-                cursor.execute("""
-                    INSERT INTO sales_history (
-                        product_id, date_sold, quantity, 
-                        is_monsoon, is_hot, is_holiday, is_cny, is_ramadan, is_deepavali
-                    ) VALUES (?,?,?,?,?,?,?,?,?)
-                """, (product_id, curr.strftime("%Y-%m-%d"), qty, monsoon, hot, holiday, cny, ramadan, deepavali))
-            
-            curr += timedelta(days=1)
-            
-    conn.commit()
-    conn.close()
-    print("--- SUCCESS: Database Created with Images (Packet, Seed, Tree) ---")
-
-# --- 6. FUNCTION TO READ DATA ---
-def load_products_from_db():
+        product_ids.append(cursor.lastrowid)
+
+    # Generate History (one deterministic grid per block of products, optionally across processes)
+    dates, _, months = build_calendar(start_date, days)
+    flags = get_season_flags(months)
+    fields = ("name", "cat", "days_to_grow", "peak_harvest_month")
+    jobs = [
+        (block, [{k: prod[k] for k in fields} for prod in products[start:start + HISTORY_BLOCK]], seed, start_date, days, stores)
+        for block, start in enumerate(range(0, len(products), HISTORY_BLOCK))
+    ]
+
+    date_strings = np.datetime_as_string(dates, unit="D")
+
+    if workers > 1:
+        print(f"Generating history with {workers} worker processes...")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Results come back in block order, so this (single writer) process commits rows in product order
+            blocks = _bounded_map(pool, generate_block_history, jobs, window=workers * 2)
+            quantities = (grid for block in blocks for grid in block)
+            bulk_load_sales(conn, iter_sales_rows(product_ids, date_strings, flags, quantities))
+    else:
+        blocks = map(generate_block_history, jobs)
+        quantities = (grid for block in blocks for grid in block)
+        bulk_load_sales(conn, iter_sales_rows(product_ids, date_strings, flags, quantities))
+
+# --- 5b. BULK LOADER ---
+BULK_CHUNK_SIZE = 50000
+
+INSERT_SALES_SQL = """
+    INSERT INTO sales_history (
+        product_id, date_sold, quantity, 
+        is_monsoon, is_hot, is_holiday, is_cny, is_ramadan, is_deepavali, store_id
+    ) VALUES (?,?,?,?,?,?,?,?,?,?)
+"""
+
+def iter_sales_rows(product_ids, dates, flags, quantities):
+    """
+    Yields sales_history rows, skipping days with no sales.
+    `quantities` is any iterable of per-product (stores, days) arrays, in product order.
     """
-    Reads all products from the database and returns them as a list of dictionaries.
+    dates = dates.tolist()
+    day_flags = flags.T.tolist()
+    for product_id, grid in zip(product_ids, quantities):
+        for store_id, qty_row in enumerate(grid.tolist(), start=1):
+            for date_sold, qty, day_flag in zip(dates, qty_row, day_flags):
+                if qty > 0:
+                    yield (product_id, date_sold, qty, *day_flag, store_id)
+
+def bulk_load_sales(conn, rows, chunk_size=BULK_CHUNK_SIZE):
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  
+    Streams rows into sales_history with executemany, chunk_size rows at a time, in a single transaction.
+    Journaling and fsync are relaxed for the load; indexes (schema migrations) are built afterwards.
+    Returns the number of rows loaded.
+    """
+    rows = iter(rows)
     cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM products")
-    rows = cursor.fetchall()
-    
-    products = []
-    for row in rows:
-        products.append(dict(row))
-        
-    conn.close()
-    return products
+
+    # PRAGMAs cannot be changed inside an open transaction
+    conn.commit()
+    journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+    synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+    cursor.execute("PRAGMA journal_mode = MEMORY")
+    cursor.execute("PRAGMA synchronous = OFF")
+
+    total = 0
+    start = time.perf_counter()
+    try:
+        cursor.execute("BEGIN")
+        for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+            cursor.executemany(INSERT_SALES_SQL, chunk)
+            total += len(chunk)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+        cursor.execute(f"PRAGMA synchronous = {synchronous}")
+    load_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    database.migrate(conn)
+    index_secs = time.perf_counter() - start
+
+    rate = total / load_secs if load_secs > 0 else float("inf")
+    print(f"Loaded {total:,} sales rows in {load_secs:.2f}s ({rate:,.0f} rows/sec), indexes built in {index_secs:.2f}s")
+    return total
 
 if __name__ == "__main__":
-    generate_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the SeSeed demo database.")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed (same seed = identical database)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to generate product histories")
+    parser.add_argument("--preset", choices=sorted(SCALE_PRESETS), help="Benchmark dataset size (sets variants/years/stores; explicit flags win)")
+    parser.add_argument("--variants", type=int, default=None, help="Jittered clones generated per product template (default 1)")
+    parser.add_argument("--years", type=int, default=None, help=f"Years of sales history (default {YEARS_TO_GENERATE})")
+    parser.add_argument("--stores", type=int, default=None, help="Store locations with their own sales history (default 1)")
+    parser.add_argument("--start-date", type=datetime.fromisoformat, default=START_DATE, help="First day of history (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    scale = dict(SCALE_PRESETS[args.preset]) if args.preset else {"variants": 1, "years": YEARS_TO_GENERATE, "stores": 1}
+    for knob in scale:
+        if getattr(args, knob) is not None:
+            scale[knob] = getattr(args, knob)
+    generate_data(seed=args.seed, workers=args.workers, start_date=args.start_date, **scale)
\ No newline at end of file
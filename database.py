@@ -0,0 +1,269 @@
+import base64
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+import image_store
+
+# --- CONFIG (ROBUST PATHS) ---
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(CURRENT_DIR, "database.db")
+
+BUSY_TIMEOUT_MS = 5000      # Wait for a competing writer instead of failing with "database is locked"
+STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection (sqlite3 default is 128)
+MAX_IDLE_CONNECTIONS = 8
+
+# --- CONNECTIONS ---
+def open_connection(path=None):
+    """
+    Opens a new, unpooled connection with the app's settings (WAL, busy timeout, statement cache).
+    Use connection() instead unless you need a private connection (e.g. the bulk loader).
+    `path` defaults to DB_PATH, read at call time (tools may point the pool at another file).
+    """
+    conn = sqlite3.connect(
+        path or DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,  # Pooled connections move between (short-lived) Streamlit threads
+    )
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+# --- SCHEMA MIGRATIONS ---
+def _move_product_images(conn):
+    """
+    Databases generated before the image store kept each product image as a base64 data URI
+    in products.image/image_seed/image_tree. Ingests those into the image store and replaces
+    the columns with image_id/image_seed_id/image_tree_id. No-op on newer databases.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(products)")}
+    if "image" not in columns:
+        return
+    cursor = conn.cursor()
+    image_store.create_schema(cursor)
+    for key in ("image", "image_seed", "image_tree"):
+        if f"{key}_id" not in columns:
+            conn.execute(f"ALTER TABLE products ADD COLUMN {key}_id TEXT REFERENCES images(id)")
+
+    rows = conn.execute("SELECT id, name, image, image_seed, image_tree FROM products").fetchall()
+    for product_id, name, *uris in rows:
+        ids = []
+        for uri in uris:
+            # Anything that is not a data URI was the online fallback image
+            if uri and uri.startswith("data:") and "," in uri:
+                ids.append(image_store.put_image(cursor, base64.b64decode(uri.split(",", 1)[1]), name))
+            else:
+                ids.append(None)
+        conn.execute(
+            "UPDATE products SET image_id = ?, image_seed_id = ?, image_tree_id = ? WHERE id = ?",
+            (*ids, product_id)
+        )
+    for key in ("image", "image_seed", "image_tree"):
+        conn.execute(f"ALTER TABLE products DROP COLUMN {key}")
+
+# Applied in order on top of the tables created by data_gen.generate_data.
+# The number of applied migrations is stored in PRAGMA user_version.
+# A step is a list of SQL statements and/or callables taking the connection.
+MIGRATIONS = [
+    # 1. sales_history analytics: a month column (no per-row strftime) and a covering index
+    [
+        "ALTER TABLE sales_history ADD COLUMN sold_month TEXT GENERATED ALWAYS AS (substr(date_sold, 1, 7)) VIRTUAL",
+        "CREATE INDEX IF NOT EXISTS idx_sales_product_date ON sales_history(product_id, date_sold, quantity)",
+    ],
+    # 2. sales_monthly rollup (one row per product and month), kept current by triggers.
+    #    Flags are stored as day counts so deletes can be subtracted; flag max = (count > 0).
+    [
+        """
+        CREATE TABLE IF NOT EXISTS sales_monthly (
+            product_id INTEGER,
+            year INTEGER,
+            month INTEGER,
+            quantity INTEGER,
+            days INTEGER,
+            monsoon_days INTEGER,
+            hot_days INTEGER,
+            holiday_days INTEGER,
+            cny_days INTEGER,
+            ramadan_days INTEGER,
+            deepavali_days INTEGER,
+            PRIMARY KEY (product_id, year, month)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO sales_monthly (product_id, year, month, quantity, days, monsoon_days, hot_days, holiday_days, cny_days, ramadan_days, deepavali_days)
+        SELECT product_id, CAST(substr(date_sold, 1, 4) AS INTEGER), CAST(substr(date_sold, 6, 2) AS INTEGER), SUM(quantity), COUNT(*),
+               SUM(is_monsoon), SUM(is_hot), SUM(is_holiday), SUM(is_cny), SUM(is_ramadan), SUM(is_deepavali)
+        FROM sales_history
+        GROUP BY 1, 2, 3
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_monthly_insert AFTER INSERT ON sales_history BEGIN
+            INSERT INTO sales_monthly (product_id, year, month, quantity, days, monsoon_days, hot_days, holiday_days, cny_days, ramadan_days, deepavali_days)
+            VALUES (NEW.product_id, CAST(substr(NEW.date_sold, 1, 4) AS INTEGER), CAST(substr(NEW.date_sold, 6, 2) AS INTEGER), NEW.quantity, 1,
+                    NEW.is_monsoon, NEW.is_hot, NEW.is_holiday, NEW.is_cny, NEW.is_ramadan, NEW.is_deepavali)
+            ON CONFLICT (product_id, year, month) DO UPDATE SET
+                quantity = quantity + excluded.quantity,
+                days = days + 1,
+                monsoon_days = monsoon_days + excluded.monsoon_days,
+                hot_days = hot_days + excluded.hot_days,
+                holiday_days = holiday_days + excluded.holiday_days,
+                cny_days = cny_days + excluded.cny_days,
+                ramadan_days = ramadan_days + excluded.ramadan_days,
+                deepavali_days = deepavali_days + excluded.deepavali_days;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_monthly_delete AFTER DELETE ON sales_history BEGIN
+            UPDATE sales_monthly SET
+                quantity = quantity - OLD.quantity,
+                days = days - 1,
+                monsoon_days = monsoon_days - OLD.is_monsoon,
+                hot_days = hot_days - OLD.is_hot,
+                holiday_days = holiday_days - OLD.is_holiday,
+                cny_days = cny_days - OLD.is_cny,
+                ramadan_days = ramadan_days - OLD.is_ramadan,
+                deepavali_days = deepavali_days - OLD.is_deepavali
+            WHERE product_id = OLD.product_id AND year = CAST(substr(OLD.date_sold, 1, 4) AS INTEGER) AND month = CAST(substr(OLD.date_sold, 6, 2) AS INTEGER);
+            DELETE FROM sales_monthly
+            WHERE product_id = OLD.product_id AND year = CAST(substr(OLD.date_sold, 1, 4) AS INTEGER) AND month = CAST(substr(OLD.date_sold, 6, 2) AS INTEGER) AND days <= 0;
+        END
+        """,
+    ],
+    # 3. Precomputed forecasts: every product x month output of one model version (see ai_engine)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS forecasts (
+            model_version TEXT,
+            product_name TEXT,
+            month INTEGER,
+            predicted_sales INTEGER,
+            reasoning TEXT,
+            PRIMARY KEY (model_version, product_name, month)
+        ) WITHOUT ROWID
+        """,
+    ],
+    # 4. Signed per-flag contributions behind each forecast (JSON)
+    [
+        "ALTER TABLE forecasts ADD COLUMN contributions TEXT",
+    ],
+    # 5. Chatbot answers cached per inventory fingerprint (see response_cache)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS chat_cache (
+            scope TEXT,
+            question TEXT,
+            answer TEXT,
+            created_at REAL,
+            last_used REAL,
+            PRIMARY KEY (scope, question)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_chat_cache_created ON chat_cache(created_at)",
+    ],
+    # 6. Base64 image columns from before the image store -> content-addressed images
+    [
+        _move_product_images,
+    ],
+    # 7. Month totals come from sales_monthly: the old month index only cost inserts
+    [
+        "DROP INDEX IF EXISTS idx_sales_month",
+    ],
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate(conn):
+    """
+    Applies any pending migrations. Safe to call repeatedly and from several processes.
+    Returns False (and does nothing) while the base tables do not exist yet.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sales_history'").fetchone() is None:
+        return False
+    if conn.in_transaction:
+        conn.commit()
+
+    for version, statements in enumerate(MIGRATIONS, start=1):
+        # IMMEDIATE takes the write lock first, so two processes cannot apply the same step
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < version:
+                for sql in statements:
+                    if callable(sql):
+                        sql(conn)
+                    else:
+                        conn.execute(sql)
+                conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return True
+
+# --- POOL ---
+# Idle connections wait in a queue. A thread borrows one for the duration of a
+# `with connection()` block (nested blocks share it), so each thread uses at most
+# one connection at a time and never pays the connect cost once the pool is warm.
+_idle = queue.LifoQueue(maxsize=MAX_IDLE_CONNECTIONS)
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def _checkout():
+    global _schema_ready
+    try:
+        conn = _idle.get_nowait()
+    except queue.Empty:
+        conn = open_connection()
+
+    # First use in this process: bring an existing database up to date
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                _schema_ready = migrate(conn)
+    return conn
+
+def _checkin(conn):
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _idle.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+@contextmanager
+def connection():
+    """
+    Borrows this thread's pooled connection.
+    Commits when the outermost block exits normally, rolls back if it raises.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        yield conn  # Nested block: the outermost one commits
+        return
+
+    conn = _checkout()
+    _local.conn = conn
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _local.conn = None
+        _checkin(conn)
+
+def close_all():
+    """
+    Closes every idle pooled connection (e.g. before deleting or regenerating the database file).
+    The schema is re-checked on the next checkout.
+    """
+    global _schema_ready
+    _schema_ready = False
+    while True:
+        try:
+            _idle.get_nowait().close()
+        except queue.Empty:
+            return
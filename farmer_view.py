@@ -6,6 +6,7 @@ from utils import get_base64_of_bin_file
 # --- NEW IMPORT FOR VOICE ---
 from streamlit_mic_recorder import mic_recorder
 import backend # Ensure backend is imported
+import image_store
 
 # --- CONFIRMATION DIALOG FUNCTION ---
 if hasattr(st, 'dialog'):
@@ -46,6 +47,32 @@ def thank_you_dialog():
         st.session_state['show_cart_modal'] = False # Close cart modal
         st.rerun()
 
+# --- VOICE REPLY (ATTACHED WHEN READY) ---
+# TTS runs on backend's worker pool; the message keeps the Future under 'audio_job'
+# until the audio is ready, and only this small fragment re-runs while it waits.
+AUDIO_POLL_SECONDS = 0.5
+fragment = st.fragment if hasattr(st, 'fragment') else st.experimental_fragment
+
+def resolve_audio(msg):
+    """
+    Moves finished TTS output from msg['audio_job'] to msg['audio']. True if audio is still pending.
+    """
+    job = msg.get("audio_job")
+    if job is None:
+        return False
+    if not job.done():
+        return True
+    msg["audio"] = job.result()
+    del msg["audio_job"]
+    return False
+
+@fragment(run_every=AUDIO_POLL_SECONDS)
+def pending_audio(msg):
+    if resolve_audio(msg):
+        st.caption("🔊 Preparing voice reply...")
+    else:
+        st.rerun()  # Redraw the history with the player (and stop polling)
+
 # --- FARMER DASHBOARD ---
 def farmer_dashboard(products):
     
@@ -321,9 +348,14 @@ def farmer_dashboard(products):
         for msg in st.session_state.messages:
             with st.chat_message(msg["role"]):
                 st.markdown(msg["content"])
-                if msg.get("audio"):
+                if resolve_audio(msg):
+                    pending_audio(msg)
+                elif msg.get("audio"):
                     st.audio(msg["audio"], format="audio/mp3")
 
+        # New exchange is drawn here, at the end of the history (above the input controls)
+        new_exchange = st.container()
+
         # 2. Voice Input Button (Always at bottom of history)
         st.write("Tap microphone to speak:")
         cmic1, cmic2, cmic3 = st.columns([2,1,2])
@@ -358,17 +390,22 @@ def farmer_dashboard(products):
 
         # 5. Execute & Rerun (This keeps everything clean)
         if final_prompt:
-            # Add User Message
+            with new_exchange:
+                with st.chat_message("user"):
+                    st.markdown(final_prompt)
+
+                # Generate AI Response (streamed: the reply appears as it is written)
+                with st.chat_message("assistant"):
+                    response_text = st.write_stream(backend.ask_ai(final_prompt, stream=True))
+
+            # Add both messages only once the reply is complete, so an interrupted run
+            # never leaves a question without its answer in the history.
+            # The reply's audio is generated in the background from the final text.
             st.session_state.messages.append({"role": "user", "content": final_prompt, "audio": None})
-            
-            # Generate AI Response
-            with st.spinner("Seseedy is thinking..."):
-                response_text = backend.ask_ai(final_prompt)
-                # Generate Audio
-                tts_audio_bytes = backend.text_to_speech_bytes(response_text)
-
-            # Add AI Message
-            st.session_state.messages.append({"role": "assistant", "content": response_text, "audio": tts_audio_bytes})
+            st.session_state.messages.append({
+                "role": "assistant", "content": response_text, "audio": None,
+                "audio_job": backend.text_to_speech_async(response_text),
+            })
             
             # FORCE REFRESH
             st.rerun()
@@ -476,7 +513,8 @@ def farmer_dashboard(products):
                 with st.container():
                     c1, c2, c3, c4 = st.columns([1, 3, 1, 1])
                     with c1:
-                        st.image(item['image'], width=80)
+                        # Images are static URLs (see image_store), so render them as <img> rather than st.image
+                        st.markdown(f"<img src='{image_store.pick_url(item, 'image', 80)}' width='80'>", unsafe_allow_html=True)
                     with c2:
                         st.subheader(item['name'])
                         st.write(f"Price: RM {item['price']:.2f} / unit")
@@ -515,9 +553,10 @@ def farmer_dashboard(products):
         st.markdown(f"## {prod['name']}")
         
         with st.container():
-            img_packet = prod.get('image', '')
-            img_seed = prod.get('image_seed', img_packet)
-            img_tree = prod.get('image_tree', img_packet) 
+            # Smallest stored variant that fills the 250px detail boxes
+            img_packet = image_store.pick_url(prod, 'image', 250)
+            img_seed = image_store.pick_url(prod, 'image_seed', 250)
+            img_tree = image_store.pick_url(prod, 'image_tree', 250)
             
             img_c1, img_c2, img_c3 = st.columns(3)
             
@@ -679,7 +718,7 @@ def farmer_dashboard(products):
                         with st.container(border=True):
                             st.markdown(f"""
                                 <div style="height: 200px; overflow: hidden; border-radius: 8px; margin-bottom: 10px; display: flex; justify-content: center; align-items: center; background-color: white;">
-                                    <img src="{p['image']}" style="max-width: 100%; max-height: 100%; object-fit: contain;">
+                                    <img src="{image_store.pick_url(p, 'image', 200)}" style="max-width: 100%; max-height: 100%; object-fit: contain;">
                                 </div>
                                 """, unsafe_allow_html=True)
                             
@@ -0,0 +1,144 @@
+import json
+import os
+import numpy as np
+
+# --- COMPACT FOREST FORMAT ---
+# A trained RandomForestRegressor flattened into one set of node arrays shared by all trees
+# (node ids are global; children point at global ids, -1 marks a leaf). Each array is a plain
+# .npy file, memory-mapped read-only on load: no pickle, and every process serving the app
+# shares the same page-cache pages instead of holding its own copy of the forest.
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+ARRAYS = {
+    "left": np.int32,         # Global id of the left child, -1 for leaves
+    "right": np.int32,        # Global id of the right child, -1 for leaves
+    "feature": np.int32,      # Feature the node splits on (-2 for leaves)
+    "threshold": np.float64,  # Go left when x[feature] <= threshold
+    "value": np.float64,      # Mean target of the training rows in the node
+}
+DEDUPE_MIN_ROWS = 256  # predict() batches above this are reduced to their distinct rows first
+
+def artifact_files(path):
+    """
+    Every file of the artifact in `path`, meta last (it is written last on export).
+    """
+    return [os.path.join(path, f"{name}.npy") for name in ARRAYS] + [os.path.join(path, META_FILE)]
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def export_forest(rf, classes, path):
+    """
+    Writes a fitted RandomForestRegressor and its product classes (encoder order) to `path`.
+    Returns the total number of nodes.
+    """
+    arrays = {name: [] for name in ARRAYS}
+    roots = []
+    offset = 0
+    for estimator in rf.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        roots.append(offset)
+        arrays["left"].append(np.where(is_leaf, -1, tree.children_left + offset))
+        arrays["right"].append(np.where(is_leaf, -1, tree.children_right + offset))
+        arrays["feature"].append(tree.feature)
+        arrays["threshold"].append(tree.threshold)
+        arrays["value"].append(tree.value[:, 0, 0])
+        offset += tree.node_count
+
+    os.makedirs(path, exist_ok=True)
+    for name, dtype in ARRAYS.items():
+        data = np.concatenate(arrays[name]).astype(dtype)
+        _write_atomic(os.path.join(path, f"{name}.npy"), lambda f: np.save(f, data, allow_pickle=False))
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "n_features": int(rf.n_features_in_),
+        "roots": roots,
+        "classes": [str(c) for c in classes],
+    }
+    _write_atomic(os.path.join(path, META_FILE), lambda f: f.write(json.dumps(meta).encode()))
+    return offset
+
+class CompactForest:
+    """
+    Read-only forest loaded from an exported artifact. Predictions match
+    RandomForestRegressor.predict on the model it was exported from.
+    """
+    def __init__(self, path):
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported model format in {path}: {meta.get('format')}")
+
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r', allow_pickle=False))
+        self.roots = np.array(meta["roots"], dtype=np.intp)
+        self.n_features = meta["n_features"]
+        self.classes = meta["classes"]
+
+        # Traversal tables (private copies, ~24 bytes per node): leaves point at themselves, so
+        # every (row, tree) pair can take the same number of steps without masking, and both
+        # children sit side by side so one gather picks the next node: _next[2 * node + go_left]
+        is_leaf = self.left == -1
+        node_ids = np.arange(len(self.left))
+        self._next = np.stack([
+            np.where(is_leaf, node_ids, self.right),
+            np.where(is_leaf, node_ids, self.left),
+        ], axis=1).ravel()
+        self._split_feature = np.where(is_leaf, 0, self.feature).astype(np.intp)
+        self.max_depth = self._depth()
+
+    def _depth(self):
+        """
+        Longest root -> leaf path over all trees.
+        """
+        depth = 0
+        nodes = self.roots[self.left[self.roots] != -1]
+        while len(nodes):
+            depth += 1
+            kids = np.concatenate([self.left[nodes], self.right[nodes]])
+            nodes = kids[self.left[kids] != -1]
+        return depth
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """
+        Leaf reached in every tree: (rows, trees) array of global node ids.
+        All trees x all rows advance one level per step.
+        """
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.n_features)  # sklearn compares splits in float32
+        flat_x = X.ravel()
+        row_base = (np.arange(len(X)) * self.n_features)[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = flat_x[row_base + self._split_feature[node]] <= self.threshold[node]
+            node = self._next[2 * node + go_left]
+        return node
+
+    def leaf_mean(self, leaves):
+        """
+        Prediction from apply()'s output: mean leaf value over the trees.
+        cumsum adds tree by tree (no pairwise summation), in the same order as sklearn,
+        so the result is bit-identical to RandomForestRegressor.predict.
+        """
+        if leaves.size == 0:
+            return np.zeros(len(leaves))
+        return np.cumsum(self.value[leaves], axis=1)[:, -1] / self.n_trees
+
+    def predict(self, X):
+        """
+        Same values as RandomForestRegressor.predict. App inputs repeat a lot (product x month
+        with month-derived flags), so larger batches only traverse their distinct rows.
+        """
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.n_features)
+        if len(X) <= DEDUPE_MIN_ROWS:
+            return self.leaf_mean(self.apply(X))
+        unique_rows, inverse = np.unique(X, axis=0, return_inverse=True)
+        return self.leaf_mean(self.apply(unique_rows))[inverse.ravel()]
@@ -0,0 +1,184 @@
+import hashlib
+import importlib.util
+import io
+import os
+import sqlite3
+from utils import LazyModule
+
+# Pillow is optional: without it only the original ("full") variant is stored.
+# It is only needed at ingest, so it is imported on first use, not by readers of image URLs.
+HAS_PIL = importlib.util.find_spec("PIL") is not None
+Image = LazyModule("PIL.Image")
+features = LazyModule("PIL.features")
+
+# --- CONFIG (ROBUST PATHS) ---
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Streamlit serves <app dir>/static/ at app/static/ (see .streamlit/config.toml)
+IMAGE_DIR = os.path.join(CURRENT_DIR, "static", "img")
+IMAGE_URL_PREFIX = "app/static/img"
+
+# Size tiers generated at ingest (longest side in px). "full" is always the original file.
+VARIANT_SIZES = {"thumb": 128, "medium": 320}
+
+# Fallback image (Online URL to prevent crashes if local files missing)
+FALLBACK_IMAGE_URL = "https://images.unsplash.com/photo-1523301343968-6a6ebf63c672?w=400"
+
+# File signatures -> (extension, mime type)
+_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", ".png", "image/png"),
+    (b"\xff\xd8\xff", ".jpg", "image/jpeg"),
+    (b"GIF8", ".gif", "image/gif"),
+]
+
+def _sniff(data):
+    """
+    Guesses (extension, mime type) from the file header.
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ".webp", "image/webp"
+    for magic, ext, mime in _SIGNATURES:
+        if data.startswith(magic):
+            return ext, mime
+    return ".bin", "application/octet-stream"
+
+# --- SCHEMA ---
+def create_schema(cursor):
+    """
+    Creates the images table. One row per distinct image; the id is the file name in IMAGE_DIR.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS images (
+            id TEXT PRIMARY KEY,
+            mime TEXT,
+            bytes INTEGER,
+            source TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS image_variants (
+            image_id TEXT REFERENCES images(id),
+            variant TEXT,
+            file TEXT,
+            width INTEGER,
+            height INTEGER,
+            bytes INTEGER,
+            PRIMARY KEY (image_id, variant)
+        )
+    ''')
+
+# --- WRITE PATH ---
+def _write_file(data):
+    """
+    Writes bytes to IMAGE_DIR under their content hash (once) and returns the file name.
+    """
+    ext, _ = _sniff(data)
+    file_name = hashlib.sha256(data).hexdigest() + ext
+    path = image_path(file_name)
+
+    if not os.path.exists(path):
+        os.makedirs(IMAGE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return file_name
+
+def _make_variants(data):
+    """
+    Yields (variant, bytes, width, height) for every size tier, including the untouched original.
+    Downscaled tiers are WebP when Pillow supports it, PNG otherwise.
+    """
+    if not HAS_PIL:
+        yield "full", data, None, None
+        return
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+    except OSError:
+        yield "full", data, None, None  # Not something Pillow can decode; serve it as-is
+        return
+    yield "full", data, img.width, img.height
+
+    for variant, size in VARIANT_SIZES.items():
+        if max(img.size) <= size:
+            continue  # The original already fits this tier
+        small = img.copy()
+        small.thumbnail((size, size))
+        buf = io.BytesIO()
+        if features.check("webp"):
+            small.save(buf, format="WEBP", quality=80, method=4)
+        else:
+            small.save(buf, format="PNG", optimize=True)
+        yield variant, buf.getvalue(), small.width, small.height
+
+def put_image(cursor, data, source=None):
+    """
+    Stores image bytes under their content hash and returns the image id ("<sha256>.<ext>").
+    Size variants are generated here, at ingest time. Identical images are stored only once.
+    """
+    _, mime = _sniff(data)
+    image_id = _write_file(data)
+
+    cursor.execute(
+        "INSERT OR IGNORE INTO images (id, mime, bytes, source) VALUES (?, ?, ?, ?)",
+        (image_id, mime, len(data), source)
+    )
+    if cursor.rowcount == 0:
+        return image_id  # Already ingested, variants included
+
+    for variant, variant_data, width, height in _make_variants(data):
+        file_name = image_id if variant == "full" else _write_file(variant_data)
+        cursor.execute(
+            "INSERT OR REPLACE INTO image_variants (image_id, variant, file, width, height, bytes) VALUES (?, ?, ?, ?, ?, ?)",
+            (image_id, variant, file_name, width, height, len(variant_data))
+        )
+    return image_id
+
+# --- READ PATH ---
+def image_path(image_id):
+    """
+    Local file for an image id.
+    """
+    return os.path.join(IMAGE_DIR, image_id)
+
+def image_url(image_id):
+    """
+    Static URL for an image id, or the fallback image if the product has none.
+    """
+    if image_id and os.path.exists(image_path(image_id)):
+        return f"{IMAGE_URL_PREFIX}/{image_id}"
+    return FALLBACK_IMAGE_URL
+
+def load_variants(cursor):
+    """
+    Returns {image_id: [(longest side, url), ...]} sorted smallest first.
+    The original has an unknown size (None) when it was stored without Pillow and sorts last.
+    """
+    try:
+        cursor.execute("SELECT image_id, file, width, height FROM image_variants")
+        rows = cursor.fetchall()
+    except sqlite3.OperationalError:
+        return {}  # Database created before size variants existed
+
+    variants = {}
+    for image_id, file_name, width, height in rows:
+        side = max(width, height) if width and height else None
+        variants.setdefault(image_id, []).append((side, f"{IMAGE_URL_PREFIX}/{file_name}"))
+    for tiers in variants.values():
+        tiers.sort(key=lambda tier: float("inf") if tier[0] is None else tier[0])
+    return variants
+
+def pick_url(prod, key, box_px):
+    """
+    URL of the smallest variant of prod[key] ('image', 'image_seed' or 'image_tree') that fills a box_px box.
+    Falls back to the largest variant, then to the product's plain URL.
+    """
+    tiers = prod.get("image_variants", {}).get(key)
+    if not tiers:
+        return prod.get(key, FALLBACK_IMAGE_URL)
+    for side, url in tiers:
+        if side is None or side >= box_px:
+            return url
+    return tiers[-1][1]
@@ -1,22 +1,16 @@
 import streamlit as st
 import time
 import os
-import base64
+from utils import ASSET_CACHE
 
 # --- BULLETPROOF IMAGE LOADER ---
 def get_base64_of_bin_file(filename):
     """
     Reads a file from the SAME directory as this script and returns base64.
+    Served from the shared asset cache, so reruns do not re-read or re-encode it.
     """
-    try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(script_dir, filename)
-        
-        with open(file_path, 'rb') as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-    except FileNotFoundError:
-        return None 
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return ASSET_CACHE.get_base64(os.path.join(script_dir, filename))
 
 # --- PAGE: ROLE SELECTION ---
 def role_selection():
@@ -0,0 +1,59 @@
+import hashlib
+import os
+import threading
+
+# --- PROCESS-WIDE MODEL REGISTRY ---
+# One shared, read-only instance per model key. Artifact files are stat'ed on every
+# lookup (cheap); they are only re-hashed when mtime/size change, and the model is
+# only reloaded when the content hash actually differs.
+_lock = threading.Lock()
+_entries = {}  # key -> {"stat": ..., "digest": ..., "model": ...}
+
+def _stat(paths):
+    """
+    (path, mtime, size) of every artifact. Raises FileNotFoundError if one is missing.
+    """
+    return tuple((path, st.st_mtime_ns, st.st_size) for path in paths for st in [os.stat(path)])
+
+def artifact_digest(paths):
+    """
+    Short SHA-256 over the artifact files' contents; used as the model version.
+    """
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()[:16]
+
+def get(key, paths, loader):
+    """
+    Returns the shared model for `key`, calling loader(digest) only when it is not loaded yet
+    or one of the artifact files changed.
+    """
+    stat = _stat(paths)
+    entry = _entries.get(key)
+    if entry is not None and entry["stat"] == stat:
+        return entry["model"]
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry["stat"] == stat:
+            return entry["model"]  # Another thread reloaded it meanwhile
+
+        digest = artifact_digest(paths)
+        if entry is not None and entry["digest"] == digest:
+            entry["stat"] = stat  # Touched but unchanged: keep the loaded model
+            return entry["model"]
+
+        print(f"Loading model '{key}' (version {digest})...")
+        model = loader(digest)
+        _entries[key] = {"stat": stat, "digest": digest, "model": model}
+        return model
+
+def loaded_versions():
+    """
+    {key: digest} of every model currently loaded in this process.
+    """
+    with _lock:
+        return {key: entry["digest"] for key, entry in _entries.items()}
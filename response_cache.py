@@ -0,0 +1,173 @@
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+import database
+from utils import content_words, split_words
+
+# --- CHATBOT RESPONSE CACHE ---
+# LLM answers keyed on the normalized question, scoped to an inventory fingerprint (a changed
+# price or stock level starts a fresh scope). Lookups are served from an in-memory LRU; every
+# answer is also written to the chat_cache table, so the cache survives restarts.
+MAX_ENTRIES = 500             # In-memory LRU size (and rows kept per scope in SQLite)
+TTL_SECONDS = 7 * 24 * 3600   # Answers older than this are asked again
+NEAR_DUPLICATE_CUTOFF = 0.9   # TF-IDF cosine needed to reuse the answer of a reworded question
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # (scope, key) -> (answer, created_at, tokens); oldest use first
+_loaded_scopes = set()
+_stats = {"lookups": 0, "exact_hits": 0, "near_hits": 0, "stores": 0}
+
+def normalize(question):
+    """
+    Cache key: lowercase words without punctuation, so "When to plant Watermelon?" and
+    "when to plant watermelon" share an entry.
+    """
+    return " ".join(split_words(question))
+
+def _tokens(key):
+    """
+    Content words of a normalized question (for near-duplicate matching).
+    """
+    return Counter(content_words(key))
+
+def _load_scope(scope):
+    """
+    Pulls the scope's unexpired rows from SQLite into memory (once per scope and process).
+    """
+    try:
+        with database.connection() as conn:
+            rows = conn.execute(
+                "SELECT question, answer, created_at FROM chat_cache WHERE scope = ? AND created_at > ? "
+                "ORDER BY last_used DESC LIMIT ?",
+                (scope, time.time() - TTL_SECONDS, MAX_ENTRIES)
+            ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # Database not created/migrated yet: start empty
+    with _lock:
+        for question, answer, created_at in reversed(rows):  # Most recently used ends up last
+            _entries.setdefault((scope, question), (answer, created_at, _tokens(question)))
+        _loaded_scopes.add(scope)
+        _evict()
+
+def _evict():
+    while len(_entries) > MAX_ENTRIES:
+        _entries.popitem(last=False)
+
+def _near_duplicate(scope, tokens, now):
+    """
+    Entry of the same scope whose TF-IDF vector is closest to `tokens`, if above the cutoff.
+    IDF is computed over the scope's cached questions, so words every question shares
+    ("plant", "grow") weigh less than the crop being asked about.
+    """
+    candidates = [(key, entry) for (s, key), entry in _entries.items()
+                  if s == scope and now - entry[1] < TTL_SECONDS]
+    if not tokens or not candidates:
+        return None
+    df = Counter()
+    for _, entry in candidates:
+        df.update(entry[2].keys())
+    n_docs = len(candidates) + 1  # The question itself counts as a document
+    idf = {w: math.log((1 + n_docs) / (1 + df[w] + (w in tokens))) + 1 for w in set(df) | set(tokens)}
+
+    def vector(counts):
+        v = {w: c * idf[w] for w, c in counts.items()}
+        norm = math.sqrt(sum(x * x for x in v.values()))
+        return v, norm
+
+    query, query_norm = vector(tokens)
+    best_key, best_score = None, NEAR_DUPLICATE_CUTOFF
+    for key, entry in candidates:
+        if not entry[2].keys() & query.keys():
+            continue
+        v, norm = vector(entry[2])
+        score = sum(x * v.get(w, 0.0) for w, x in query.items()) / (query_norm * norm)
+        if score >= best_score:
+            best_key, best_score = key, score
+    return best_key
+
+def lookup(question, scope):
+    """
+    Cached answer for `question` within `scope`, or None. Tries the exact normalized
+    question first, then the closest reworded one.
+    """
+    key = normalize(question)
+    if scope not in _loaded_scopes:
+        _load_scope(scope)
+
+    now = time.time()
+    with _lock:
+        _stats["lookups"] += 1
+        hit = key
+        entry = _entries.get((scope, key))
+        if entry is not None and now - entry[1] >= TTL_SECONDS:
+            del _entries[(scope, key)]
+            entry = None
+        if entry is None:
+            hit = _near_duplicate(scope, _tokens(key), now)
+            if hit is None:
+                return None
+            entry = _entries[(scope, hit)]
+            _stats["near_hits"] += 1
+        else:
+            _stats["exact_hits"] += 1
+        _entries.move_to_end((scope, hit))
+    _touch(scope, hit, now)
+    return entry[0]
+
+def _touch(scope, key, now):
+    try:
+        with database.connection() as conn:
+            conn.execute("UPDATE chat_cache SET last_used = ? WHERE scope = ? AND question = ?", (now, scope, key))
+    except sqlite3.OperationalError:
+        pass  # The in-memory hit is still valid
+
+def store(question, scope, answer):
+    """
+    Caches an LLM answer in memory and in SQLite; expired rows and rows beyond
+    MAX_ENTRIES per scope are trimmed on the way.
+    """
+    key = normalize(question)
+    if not key:
+        return
+    now = time.time()
+    with _lock:
+        _entries[(scope, key)] = (answer, now, _tokens(key))
+        _entries.move_to_end((scope, key))
+        _evict()
+        _stats["stores"] += 1
+    try:
+        with database.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chat_cache (scope, question, answer, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (scope, key, answer, now, now)
+            )
+            conn.execute("DELETE FROM chat_cache WHERE created_at <= ?", (now - TTL_SECONDS,))
+            conn.execute(
+                "DELETE FROM chat_cache WHERE scope = ? AND question NOT IN "
+                "(SELECT question FROM chat_cache WHERE scope = ? ORDER BY last_used DESC LIMIT ?)",
+                (scope, scope, MAX_ENTRIES)
+            )
+    except sqlite3.OperationalError as e:
+        print(f"Chat cache not persisted: {e}")
+
+def clear():
+    """
+    Empties the cache (memory and SQLite).
+    """
+    with _lock:
+        _entries.clear()
+        _loaded_scopes.clear()
+    try:
+        with database.connection() as conn:
+            conn.execute("DELETE FROM chat_cache")
+    except sqlite3.OperationalError:
+        pass
+
+def stats():
+    with _lock:
+        s = dict(_stats, entries=len(_entries))
+    hits = s["exact_hits"] + s["near_hits"]
+    s["hit_rate"] = hits / s["lookups"] if s["lookups"] else 0.0
+    return s
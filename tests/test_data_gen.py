@@ -0,0 +1,16 @@
+from datetime import datetime
+import numpy as np
+import pytest
+import data_gen
+
+@pytest.mark.parametrize("years", [1, 2, 3, 10])
+@pytest.mark.parametrize("month", range(1, 13))
+def test_sales_history_for_every_start_month(month, years):
+    # The growth-cycle month table once ran short for spans starting late in the year
+    start = datetime(data_gen.START_DATE.year, month, 1)
+    days = 365 * years
+    dates, flags, quantities = data_gen.generate_sales_history(data_gen.products_list, start, days, np.random.default_rng(0))
+    assert len(dates) == days
+    assert flags.shape == (6, days)
+    assert quantities.shape == (len(data_gen.products_list), days)
+    assert (quantities > 0).all()
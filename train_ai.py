@@ -1,76 +1,176 @@
-import sqlite3
+import ai_engine
+import argparse
+import database
+import forest_engine
+import hashlib
+import json
+import os
 import pandas as pd
 import pickle
+import time
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import LabelEncoder
 
 # --- CONFIG ---
-DB_PATH = "database.db"
-MODEL_PATH = "seed_predictor_model.pkl"
-ENCODER_PATH = "label_encoder.pkl"
-
-def train_model():
-    # 1. Load Data
-    conn = sqlite3.connect(DB_PATH)
-    
+# Same files ai_engine uses (next to the scripts, not the working directory)
+MODEL_PATH = ai_engine.MODEL_PATH
+ENCODER_PATH = ai_engine.ENCODER_PATH
+MODEL_DIR = ai_engine.MODEL_DIR
+# Sidecar with what the saved model was trained on (used to decide on incremental growth)
+META_PATH = os.path.join(ai_engine.CURRENT_DIR, "seed_predictor_model.json")
+
+N_ESTIMATORS = 100     # Trees in a freshly trained forest
+GROW_ESTIMATORS = 20   # Trees added when new months arrive
+MAX_ESTIMATORS = 300   # Past this, retrain from scratch instead of growing
+
+FEATURES = [
+    'product_encoded', 'month',
+    'is_monsoon', 'is_hot', 'is_holiday',
+    'is_cny', 'is_ramadan', 'is_deepavali'
+]
+
+def load_previous():
+    """
+    Returns (model, encoder, meta) of the last training run, or None if any artifact is missing.
+    """
+    try:
+        with open(META_PATH) as f:
+            meta = json.load(f)
+        with open(MODEL_PATH, 'rb') as f:
+            rf = pickle.load(f)
+        with open(ENCODER_PATH, 'rb') as f:
+            le = pickle.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return rf, le, meta
+
+def data_fingerprint(monthly_df, through):
+    """
+    Hash of the training rows up to month index `through` (year * 12 + month - 1).
+    A regenerated or rewritten history changes it even when it covers the same months.
+    """
+    month_index = monthly_df['year'] * 12 + monthly_df['month'] - 1
+    rows = monthly_df.loc[month_index <= through, ['product_name', 'year', 'month', 'quantity'] + FEATURES[2:]]
+    hashed = pd.util.hash_pandas_object(rows, index=False)
+    return hashlib.sha256(hashed.values.tobytes()).hexdigest()[:16]
+
+def train_model(full=False):
+    timings = {}
+
+    # 1. Load Data (already aggregated Daily -> Monthly by the sales_monthly rollup)
     # We join products to get the name (for encoding)
+    # Logic: Sum quantity, but take the MAX of flags (if it happened that month, the flag is True)
+    t0 = time.perf_counter()
     query = """
-        SELECT 
+        SELECT
             p.name as product_name,
-            s.date_sold,
-            s.quantity,
-            s.is_monsoon, s.is_hot, s.is_holiday, 
-            s.is_cny, s.is_ramadan, s.is_deepavali
-        FROM sales_history s
-        JOIN products p ON s.product_id = p.id
+            m.year,
+            m.month,
+            m.quantity,
+            m.monsoon_days > 0 as is_monsoon, m.hot_days > 0 as is_hot, m.holiday_days > 0 as is_holiday,
+            m.cny_days > 0 as is_cny, m.ramadan_days > 0 as is_ramadan, m.deepavali_days > 0 as is_deepavali
+        FROM sales_monthly m
+        JOIN products p ON m.product_id = p.id
+        ORDER BY p.name, m.year, m.month
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    with database.connection() as conn:
+        monthly_df = pd.read_sql_query(query, conn)
+    timings['load'] = time.perf_counter() - t0
 
-    # 2. Preprocessing & Aggregation (Daily -> Monthly)
-    # Convert date to datetime
-    df['date_sold'] = pd.to_datetime(df['date_sold'])
-    df['month'] = df['date_sold'].dt.month
-    df['year'] = df['date_sold'].dt.year
+    print(f"Training on {len(monthly_df)} monthly aggregated records...")
 
-    # Aggregate by Month + Product
-    # Logic: Sum quantity, but take the MAX of flags (if it happened that month, the flag is True)
-    monthly_df = df.groupby(['product_name', 'year', 'month']).agg({
-        'quantity': 'sum',
-        'is_monsoon': 'max',
-        'is_hot': 'max',
-        'is_holiday': 'max',
-        'is_cny': 'max',
-        'is_ramadan': 'max',
-        'is_deepavali': 'max'
-    }).reset_index()
+    # 2. Aggregate: encode product names and build the feature matrix
+    # Input: Product ID, Month, and the 6 Context Flags
+    t0 = time.perf_counter()
+    products = sorted(monthly_df['product_name'].unique())
+    last_month = monthly_df['year'] * 12 + monthly_df['month'] - 1
+    trained_through = int(last_month.max())
 
-    print(f"Training on {len(monthly_df)} monthly aggregated records...")
+    # Grow the saved forest only if the product set and the months it was trained on are
+    # unchanged (same rows, same values) and there are newer months
+    previous = None if full else load_previous()
+    if previous is not None:
+        rf, le, meta = previous
+        if list(le.classes_) != products:
+            print("Product list changed: retraining from scratch.")
+            previous = None
+        elif "fingerprint" not in meta or data_fingerprint(monthly_df, meta["trained_through"]) != meta["fingerprint"]:
+            print("Training data changed since the last run: retraining from scratch.")
+            previous = None
+        elif meta["trained_through"] >= trained_through:
+            print(f"--- Model is up to date (trained through {meta['trained_through_label']}) ---")
+            return
+        elif rf.n_estimators + GROW_ESTIMATORS > MAX_ESTIMATORS:
+            print(f"Forest reached {rf.n_estimators} trees: retraining from scratch.")
+            previous = None
 
-    # 3. Encode Product Names
-    le = LabelEncoder()
-    monthly_df['product_encoded'] = le.fit_transform(monthly_df['product_name'])
+    if previous is None:
+        le = LabelEncoder()
+        le.fit(products)
+        rf = RandomForestRegressor(n_estimators=N_ESTIMATORS, random_state=42)
+    else:
+        new_months = int((last_month > meta["trained_through"]).sum())
+        print(f"{new_months} new monthly records: growing the forest by {GROW_ESTIMATORS} trees.")
+        rf.set_params(warm_start=True, n_estimators=rf.n_estimators + GROW_ESTIMATORS)
 
-    # 4. Define Features & Target
-    # Input: Product ID, Month, and the 6 Context Flags
-    X = monthly_df[[
-        'product_encoded', 'month', 
-        'is_monsoon', 'is_hot', 'is_holiday', 
-        'is_cny', 'is_ramadan', 'is_deepavali'
-    ]]
+    monthly_df['product_encoded'] = le.transform(monthly_df['product_name'])
+    X = monthly_df[FEATURES]
     y = monthly_df['quantity']
+    timings['aggregate'] = time.perf_counter() - t0
 
-    # 5. Train Random Forest
-    rf = RandomForestRegressor(n_estimators=100, random_state=42)
+    # 3. Train Random Forest on every core (warm start only fits the added trees)
+    t0 = time.perf_counter()
+    rf.set_params(n_jobs=-1)
     rf.fit(X, y)
+    # Serve single-threaded: the app predicts a few hundred rows at a time
+    rf.set_params(n_jobs=None, warm_start=False)
+    timings['fit'] = time.perf_counter() - t0
 
-    # 6. Save Artifacts
+    # 4. Save Artifacts
+    t0 = time.perf_counter()
     with open(MODEL_PATH, 'wb') as f:
         pickle.dump(rf, f)
     with open(ENCODER_PATH, 'wb') as f:
         pickle.dump(le, f)
+    forest_engine.export_forest(rf, le.classes_, MODEL_DIR)
+    meta = {
+        "trained_through": trained_through,
+        "trained_through_label": f"{trained_through // 12:04d}-{trained_through % 12 + 1:02d}",
+        "records": len(monthly_df),
+        "fingerprint": data_fingerprint(monthly_df, trained_through),
+        "n_estimators": rf.n_estimators,
+    }
+    with open(META_PATH, 'w') as f:
+        json.dump(meta, f, indent=2)
+    timings['serialize'] = time.perf_counter() - t0
+
+    print(f"--- SUCCESS: AI Model Trained & Saved ({rf.n_estimators} trees, data through {meta['trained_through_label']}) ---")
+    print("Stage timings: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+
+    # 5. Materialize Forecasts (every product x month for the new model version)
+    ai = ai_engine.get_shared_ai()
+    count = ai_engine.materialize_forecasts(ai)
+    print(f"Stored {count} forecasts for model version {ai.version}")
 
-    print("--- SUCCESS: AI Model Trained & Saved ---")
+def export_model():
+    """
+    Re-exports the saved pickles to the compact format the app loads (no training).
+    """
+    with open(MODEL_PATH, 'rb') as f:
+        rf = pickle.load(f)
+    with open(ENCODER_PATH, 'rb') as f:
+        le = pickle.load(f)
+    nodes = forest_engine.export_forest(rf, le.classes_, MODEL_DIR)
+    print(f"Exported {len(rf.estimators_)} trees ({nodes} nodes) to {MODEL_DIR}")
 
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the seed demand model.")
+    parser.add_argument("--full", action="store_true",
+                        help="Retrain from scratch instead of growing the saved forest.")
+    parser.add_argument("--export-only", action="store_true",
+                        help="Only convert the saved pickles to the compact model format.")
+    args = parser.parse_args()
+    if args.export_only:
+        export_model()
+    else:
+        train_model(full=args.full)
@@ -1,14 +1,169 @@
 import base64
+import importlib
+import os
 import random
+import re
+import threading
+from collections import OrderedDict
+
+# --- BYTE-BOUNDED LRU ---
+class SizedLRU:
+    """
+    Thread-safe LRU of str/bytes values, bounded by their total length rather than their count.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        The cached value (now the most recently used), or None.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = value
+            self._size += len(value)
+            # Evict least recently used, but always keep the newest entry
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                self._size -= len(self._entries.popitem(last=False)[1])
+
+    def discard(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+
+    def stats(self):
+        """
+        Hit/miss counters and current memory use.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+# --- SHARED ASSET CACHE ---
+class AssetCache(SizedLRU):
+    """
+    Process-wide LRU cache of base64-encoded files, keyed by (path, mtime, size).
+    An edited file gets a new key, so it is re-read once; everything else is served from memory.
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        super().__init__(max_bytes)
+        self._keys_by_path = {}
+
+    def get_base64(self, path):
+        """
+        Returns the file's contents as a base64 string, or None if the file does not exist.
+        """
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (path, stat.st_mtime_ns, stat.st_size)
+
+        encoded = self.get(key)
+        if encoded is not None:
+            return encoded
+
+        with open(path, 'rb') as f:
+            encoded = base64.b64encode(f.read()).decode()
+
+        # Drop the entry for an older version of the same file
+        old_key = self._keys_by_path.get(path)
+        if old_key is not None and old_key != key:
+            self.discard(old_key)
+        self._keys_by_path[path] = key
+        self.put(key, encoded)
+        return encoded
+
+ASSET_CACHE = AssetCache()
+
+# --- LAZY IMPORTS ---
+class LazyModule:
+    """
+    Stand-in for a heavy module: the real import happens on first attribute access,
+    so pages that never use it never pay for it. Use as `genai = LazyModule("google.generativeai")`.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        # Only called for names not set in __init__, i.e. the module's own attributes
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+# --- QUESTION TOKENIZER ---
+# Shared by everything that matches chat questions (router, prompt context, answer cache),
+# so the same question is the same words to all of them.
+STOPWORDS = frozenset({
+    "a", "an", "the", "is", "are", "am", "i", "me", "my", "we", "you", "your", "it", "to", "for", "of",
+    "in", "on", "at", "do", "does", "can", "could", "should", "would", "will", "please", "tell", "about",
+    "what", "which", "some", "any", "and", "or", "with", "this", "that", "there", "seed", "seeds",
+})
+
+def split_words(text):
+    """
+    Lowercase words of `text`, punctuation dropped ("What's up?" -> ["what", "s", "up"]).
+    """
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def stem(word):
+    """
+    Drops a plural 's' ("melons" -> "melon"); words of three letters or less are kept as they are.
+    """
+    return word[:-1] if len(word) > 3 and word.endswith("s") else word
+
+def content_words(text):
+    """
+    Stemmed words of `text` without STOPWORDS: what a question is about.
+    """
+    return [stem(w) for w in split_words(text) if w not in STOPWORDS]
 
 # --- FUNCTION TO LOAD IMAGE AS BASE64 STRING ---
 def get_base64_of_bin_file(bin_file):
-    try:
-        with open(bin_file, 'rb') as f:
-            data = f.read()
-        return f"data:image/png;base64,{base64.b64encode(data).decode()}"
-    except FileNotFoundError:
+    encoded = ASSET_CACHE.get_base64(bin_file)
+    if encoded is None:
         return None
+    return f"data:image/png;base64,{encoded}"
 
 # --- SEASONALITY LOGIC ---
 def get_seasonality_multiplier(logic, date):